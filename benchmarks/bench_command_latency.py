@@ -0,0 +1,113 @@
+"""Latency of a control write sent while a refresh of every stove runs.
+
+Usage: python benchmarks/bench_command_latency.py [--stoves N] [--commands N]
+                                                 [--request-rate R]
+                                                 [--latency S]
+
+The global request rate is kept low, so a refresh of all stoves queues up
+its /status polls for a while. Commands are sent to random stoves while the
+refresh is running, reported is how long each /controls POST took from the
+call to its response and how much of that was spent waiting for the request
+budget. Needs Home Assistant, run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant
+
+from custom_components.rika_firenet.connection import RikaFirenetConnectionManager
+from custom_components.rika_firenet.const import DATA_CONNECTION_MANAGER
+from custom_components.rika_firenet.core import RikaFirenetCoordinator
+from custom_components.rika_firenet.metrics import ENDPOINT_CONTROLS
+
+from bench_coordinator import percentile, point_client_at
+from fake_firenet import FakeFirenet
+
+
+async def async_main(args):
+    randomizer = random.Random(args.seed)
+    fake = FakeFirenet(stoves=args.stoves, latency=args.latency, seed=args.seed)
+    point_client_at(await fake.async_start())
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DATA_CONNECTION_MANAGER] = RikaFirenetConnectionManager(
+            hass, request_rate=args.request_rate, request_burst=1
+        )
+        coordinator = RikaFirenetCoordinator(
+            hass,
+            "bench@example.com",
+            "secret",
+            21,
+            write_coalesce_window=0,
+            max_requests_per_minute=100000,
+        )
+        try:
+            await coordinator.async_setup()
+            # Commands are built on top of the polled controls.
+            await coordinator.async_refresh()
+            stoves = coordinator.get_stoves()
+
+            start = time.perf_counter()
+            refresh = asyncio.create_task(coordinator.async_refresh())
+            latencies = []
+            while not refresh.done() and len(latencies) < args.commands:
+                await asyncio.sleep(args.interval)
+                stove = randomizer.choice(stoves)
+                command_start = time.perf_counter()
+                await stove.async_set_heating_power(10 * randomizer.randint(0, 10))
+                latencies.append(time.perf_counter() - command_start)
+            await refresh
+            refreshed = time.perf_counter() - start
+
+            metrics = coordinator.get_metrics()
+            queue_wait = metrics.endpoints[ENDPOINT_CONTROLS].queue_wait
+            await coordinator.async_shutdown()
+        finally:
+            await hass.async_stop(force=True)
+            await fake.async_stop()
+
+    print(
+        f"{args.stoves} stoves at {args.request_rate:g} requests/s,"
+        f" refresh took {refreshed:.2f} s"
+    )
+    print(
+        f"{len(latencies)} commands during the refresh:"
+        f" median {statistics.median(latencies) * 1000:.0f} ms,"
+        f" p95 {percentile(latencies, 0.95) * 1000:.0f} ms,"
+        f" max {max(latencies) * 1000:.0f} ms"
+    )
+    print(
+        f"queue wait: mean {queue_wait.get_mean() * 1000:.0f} ms,"
+        f" max {queue_wait.max * 1000:.0f} ms"
+    )
+    print(f"polls skipped for a write in flight: {metrics.skipped_polls}")
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=50)
+    arguments.add_argument("--commands", type=int, default=10)
+    arguments.add_argument("--interval", type=float, default=0.5)
+    arguments.add_argument("--request-rate", type=float, default=5)
+    arguments.add_argument("--latency", type=float, default=0.05)
+    arguments.add_argument("--seed", type=int, default=1)
+    args = arguments.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
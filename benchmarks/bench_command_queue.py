@@ -0,0 +1,168 @@
+"""Concurrency stress test of the stove command queue.
+
+Usage: python benchmarks/bench_command_queue.py [--stoves N] [--automations N]
+                                               [--writes N] [--latency S]
+                                               [--jitter S]
+
+Runs a number of automations in parallel against the fake Firenet server
+while the coordinator keeps polling. Every automation writes random values
+to random controls of random stoves. Once everything settled, the controls
+applied by the fake stoves must equal the last value written to each of
+them, and no stove may have seen two /controls POSTs at the same time.
+Needs Home Assistant, run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant
+
+from custom_components.rika_firenet.connection import RikaFirenetConnectionManager
+from custom_components.rika_firenet.const import (
+    CONTROL_CONFIRMATION_PENDING,
+    DATA_CONNECTION_MANAGER,
+)
+from custom_components.rika_firenet.core import RikaFirenetCoordinator
+from custom_components.rika_firenet.number import DEVICE_NUMBERS
+
+from bench_coordinator import point_client_at
+from fake_firenet import FakeFirenet
+
+SETTLE_TIMEOUT = 60  # seconds
+
+# Control -> (minimum, maximum) of the writable numbers
+CONTROLS = {
+    description.control: (
+        int(description.native_min_value),
+        int(description.native_max_value),
+    )
+    for description in DEVICE_NUMBERS
+    if description.control is not None
+}
+
+
+async def async_automation(args, randomizer, stoves, written):
+    """Write random controls, like an automation changing a scene."""
+    for _ in range(args.writes):
+        stove = randomizer.choice(stoves)
+        controls = {
+            control: randomizer.randint(*CONTROLS[control])
+            for control in randomizer.sample(
+                list(CONTROLS), randomizer.randint(1, len(CONTROLS))
+            )
+        }
+        # Writes are buffered in call order, before the first await.
+        for control, value in controls.items():
+            written[(stove.get_id(), control)] = value
+        await stove.async_set_controls(controls)
+        await asyncio.sleep(randomizer.uniform(0, args.think_time))
+
+
+async def async_main(args):
+    randomizer = random.Random(args.seed)
+    fake = FakeFirenet(
+        stoves=args.stoves,
+        latency=args.latency,
+        jitter=args.jitter,
+        apply_delay=args.apply_delay,
+        seed=args.seed,
+    )
+    point_client_at(await fake.async_start())
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DATA_CONNECTION_MANAGER] = RikaFirenetConnectionManager(
+            hass, request_rate=1000, request_burst=1000
+        )
+        coordinator = RikaFirenetCoordinator(
+            hass,
+            "bench@example.com",
+            "secret",
+            21,
+            write_coalesce_window=args.coalesce_window,
+            min_scan_interval=1,
+            max_requests_per_minute=100000,
+        )
+        try:
+            await coordinator.async_setup()
+            await coordinator.async_refresh()
+            remove_listener = coordinator.async_add_listener(lambda: None)
+            stoves = coordinator.get_stoves()
+
+            written = {}
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    async_automation(
+                        args, random.Random(randomizer.random()), stoves, written
+                    )
+                    for _ in range(args.automations)
+                )
+            )
+            elapsed = time.perf_counter() - start
+
+            # Let the fake stoves apply the last POSTs and the polls see them.
+            while any(
+                stove.get_control_confirmation() == CONTROL_CONFIRMATION_PENDING
+                for stove in stoves
+            ):
+                if time.perf_counter() - start > SETTLE_TIMEOUT:
+                    break
+                await asyncio.sleep(0.1)
+
+            lost = [
+                (stove_id, control, value, fake.get_controls(stove_id)[control])
+                for (stove_id, control), value in written.items()
+                if str(fake.get_controls(stove_id)[control]) != str(value)
+            ]
+            coalesced = sum(stove.get_coalesced_writes() for stove in stoves)
+            remove_listener()
+            await coordinator.async_shutdown()
+        finally:
+            await hass.async_stop(force=True)
+            await fake.async_stop()
+
+    writes = args.automations * args.writes
+    posts = sum(
+        count for endpoint, count in fake.requests.items() if "controls" in endpoint
+    )
+    print(
+        f"{args.automations} automations x {args.writes} writes on"
+        f" {args.stoves} stoves in {elapsed:.2f} s"
+    )
+    print(f"writes {writes}, POSTs {posts}, coalesced {coalesced}")
+    print(f"most concurrent POSTs to one stove: {fake.max_concurrent_writes}")
+    print(f"lost writes: {len(lost)}")
+    for stove_id, control, value, applied in lost[:10]:
+        print(f"  stove {stove_id} {control}: wrote {value}, applied {applied}")
+    return 1 if lost or fake.max_concurrent_writes > 1 else 0
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=3)
+    arguments.add_argument("--automations", type=int, default=20)
+    arguments.add_argument("--writes", type=int, default=20)
+    arguments.add_argument("--latency", type=float, default=0.05)
+    arguments.add_argument("--jitter", type=float, default=0.04)
+    arguments.add_argument("--apply-delay", type=float, default=0.2)
+    arguments.add_argument("--think-time", type=float, default=0.05)
+    arguments.add_argument("--coalesce-window", type=float, default=0.02)
+    arguments.add_argument("--seed", type=int, default=1)
+    args = arguments.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(asyncio.run(async_main(args)))
+
+
+if __name__ == "__main__":
+    main()
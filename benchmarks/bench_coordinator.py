@@ -0,0 +1,213 @@
+"""End-to-end benchmark of the coordinator against the fake Firenet server.
+
+Usage: python benchmarks/bench_coordinator.py [--stoves 1 10 50 100]
+                                             [--latency S] [--jitter S]
+                                             [--failure-rate R] [--refreshes N]
+
+For every stove count the coordinator logs in, discovers the stoves and
+refreshes them a number of times, then changes a control of a few stoves and
+waits for the /status payloads to confirm it. Reported are the refresh
+latency, the command to confirmation latency and how busy the executor
+threads were meanwhile. Needs Home Assistant, run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant
+
+from custom_components.rika_firenet import client as rika_client
+from custom_components.rika_firenet.connection import RikaFirenetConnectionManager
+from custom_components.rika_firenet.const import (
+    CONTROL_CONFIRMATION_CONFIRMED,
+    DATA_CONNECTION_MANAGER,
+    DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    GLOBAL_MAX_CONCURRENT_REQUESTS,
+    GLOBAL_REQUEST_BURST,
+    GLOBAL_REQUEST_RATE,
+)
+from custom_components.rika_firenet.core import RikaFirenetCoordinator
+from custom_components.rika_firenet.exceptions import RikaFirenetError
+
+from fake_firenet import FakeFirenet
+
+CONFIRMATION_TIMEOUT = 60  # seconds
+SETUP_ATTEMPTS = 10
+
+
+class OccupancyExecutor(ThreadPoolExecutor):
+    """Thread pool adding up the time its threads spend running jobs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.busy = 0.0
+        self.jobs = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        def run():
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.busy += time.perf_counter() - start
+                self.jobs += 1
+
+        return super().submit(run)
+
+
+def point_client_at(base_url):
+    """Send the requests of the client to the fake server."""
+    rika_client.API_BASE_URL = base_url
+    rika_client.API_LOGIN_URL = f"{base_url}/web/login"
+    rika_client.API_STOVES_URL = f"{base_url}/web/summary"
+    rika_client.API_CLIENT_URL = f"{base_url}/api/client"
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def async_run_scenario(args, stoves, config_dir):
+    loop = asyncio.get_running_loop()
+    executor = OccupancyExecutor(max_workers=args.executor_workers)
+    loop.set_default_executor(executor)
+
+    fake = FakeFirenet(
+        stoves=stoves,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        apply_delay=args.apply_delay,
+        seed=stoves,
+    )
+    point_client_at(await fake.async_start())
+
+    hass = HomeAssistant(config_dir)
+    hass.data[DATA_CONNECTION_MANAGER] = RikaFirenetConnectionManager(
+        hass,
+        max_concurrent_requests=args.global_concurrency,
+        request_rate=args.request_rate,
+        request_burst=args.request_burst,
+    )
+    coordinator = RikaFirenetCoordinator(
+        hass,
+        "bench@example.com",
+        "secret",
+        21,
+        max_concurrent_requests=args.concurrency,
+        write_coalesce_window=args.coalesce_window,
+        min_scan_interval=args.min_scan_interval,
+        max_requests_per_minute=args.max_requests_per_minute,
+    )
+    started = time.perf_counter()
+
+    try:
+        # An injected failure may hit the login or the stove list.
+        for attempt in range(SETUP_ATTEMPTS):
+            try:
+                await coordinator.async_setup()
+                break
+            except RikaFirenetError:
+                if attempt == SETUP_ATTEMPTS - 1:
+                    raise
+        # Keep the coordinator polling like it does with entities around.
+        remove_listener = coordinator.async_add_listener(lambda: None)
+
+        refreshes = []
+        for _ in range(args.refreshes):
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            refreshes.append(time.perf_counter() - start)
+
+        confirmations = []
+        for index, stove in enumerate(coordinator.get_stoves()[: args.commands]):
+            start = time.perf_counter()
+            try:
+                await stove.async_set_heating_power(10 * (index % 10))
+            except RikaFirenetError:
+                continue
+            while stove.get_control_confirmation() != CONTROL_CONFIRMATION_CONFIRMED:
+                if time.perf_counter() - start > CONFIRMATION_TIMEOUT:
+                    break
+                await asyncio.sleep(0.01)
+            else:
+                confirmations.append(time.perf_counter() - start)
+
+        remove_listener()
+        await coordinator.async_shutdown()
+    finally:
+        elapsed = time.perf_counter() - started
+        await hass.async_stop(force=True)
+        await fake.async_stop()
+        executor.shutdown()
+
+    occupancy = executor.busy / (elapsed * args.executor_workers)
+    confirmation = statistics.median(confirmations) if confirmations else float("nan")
+    print(
+        f"{stoves:>6} "
+        f"{statistics.median(refreshes) * 1000:>10.1f} "
+        f"{percentile(refreshes, 0.95) * 1000:>10.1f} "
+        f"{confirmation * 1000:>12.1f} "
+        f"{len(confirmations):>3}/{min(stoves, args.commands):<3} "
+        f"{executor.jobs:>6} {occupancy * 100:>8.2f}% "
+        f"{sum(fake.requests.values()):>8} {sum(fake.failures.values()):>6}"
+    )
+
+
+async def async_main(args):
+    print(
+        f"latency {args.latency * 1000:.0f} ms +/- {args.jitter * 1000:.0f} ms,"
+        f" failure rate {args.failure_rate:.0%}, {args.refreshes} refreshes"
+    )
+    print(
+        f"{'stoves':>6} {'refresh':>10} {'p95':>10} {'confirm':>12} {'ok':>7} "
+        f"{'jobs':>6} {'executor':>9} {'requests':>8} {'failed':>6}"
+    )
+    print(f"{'':>6} {'ms':>10} {'ms':>10} {'ms':>12}")
+    with tempfile.TemporaryDirectory() as config_dir:
+        for stoves in args.stoves:
+            await async_run_scenario(args, stoves, config_dir)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, nargs="+", default=[1, 10, 50, 100])
+    arguments.add_argument("--latency", type=float, default=0.05)
+    arguments.add_argument("--jitter", type=float, default=0.02)
+    arguments.add_argument("--failure-rate", type=float, default=0.0)
+    arguments.add_argument("--apply-delay", type=float, default=0.5)
+    arguments.add_argument("--refreshes", type=int, default=10)
+    arguments.add_argument("--commands", type=int, default=5)
+    arguments.add_argument("--concurrency", type=int, default=4)
+    arguments.add_argument("--coalesce-window", type=float, default=0.3)
+    arguments.add_argument("--min-scan-interval", type=int, default=1)
+    arguments.add_argument(
+        "--global-concurrency", type=int, default=GLOBAL_MAX_CONCURRENT_REQUESTS
+    )
+    arguments.add_argument("--request-rate", type=float, default=GLOBAL_REQUEST_RATE)
+    arguments.add_argument("--request-burst", type=int, default=GLOBAL_REQUEST_BURST)
+    arguments.add_argument(
+        "--max-requests-per-minute", type=int, default=DEFAULT_MAX_REQUESTS_PER_MINUTE
+    )
+    arguments.add_argument("--executor-workers", type=int, default=4)
+    args = arguments.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
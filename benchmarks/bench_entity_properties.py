@@ -0,0 +1,330 @@
+"""Compare the per-refresh property cost of the descriptor based entities.
+
+Usage: python benchmarks/bench_entity_properties.py [--stoves N] [--repeat N]
+
+Creates the sensor, number and switch entities of N stoves, then times the
+property reads Home Assistant does when it writes their states, once for the
+descriptor based entities and once for the former string if/elif dispatch.
+Needs Home Assistant, run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import pathlib
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from homeassistant.const import PERCENTAGE, UnitOfMass, UnitOfTemperature, UnitOfTime
+from homeassistant.core import HomeAssistant
+
+from custom_components.rika_firenet.core import (
+    RikaFirenetCoordinator,
+    RikaFirenetStove,
+)
+from custom_components.rika_firenet.number import (
+    DEVICE_NUMBERS,
+    RikaFirenetStoveNumber,
+)
+from custom_components.rika_firenet.sensor import (
+    DEVICE_SENSORS,
+    RikaFirenetStoveSensor,
+)
+from custom_components.rika_firenet.snapshot import StoveSnapshot
+from custom_components.rika_firenet.switch import (
+    DEVICE_SWITCH,
+    RikaFirenetStoveBinarySwitch,
+)
+
+# Entities the former if/elif dispatch knew, the comparison is limited to them
+LEGACY_KEYS = frozenset(
+    {
+        "stove consumption",
+        "stove runtime",
+        "stove temperature",
+        "stove thermostat",
+        "stove burning",
+        "stove status",
+        "room temperature",
+        "room thermostat",
+        "room power request",
+        "heating power",
+        "convection fan1 level",
+        "convection fan1 area",
+        "convection fan2 level",
+        "convection fan2 area",
+        "on off",
+        "convection fan1",
+        "convection fan2",
+    }
+)
+
+PAYLOAD = {
+    "sensors": {
+        "parameterFeedRateTotal": 1234,
+        "parameterRuntimePellets": 5678,
+        "inputFlameTemperature": "412",
+        "inputRoomTemperature": "21.5",
+        "statusMainState": 4,
+        "statusSubState": 0,
+        "statusFrostStarted": False,
+    },
+    "controls": {
+        "targetTemperature": "22",
+        "operatingMode": 2,
+        "setBackTemperature": "16",
+        "heatingTimesActiveForComfort": True,
+        "onOff": True,
+        "convectionFan1Active": True,
+        "convectionFan2Active": False,
+        "RoomPowerRequest": 3,
+        "convectionFan1Level": 2,
+        "convectionFan1Area": -10,
+        "convectionFan2Level": 0,
+        "convectionFan2Area": 0,
+        "heatingPower": 70,
+    },
+}
+
+
+class LegacySensor(RikaFirenetStoveSensor):
+    """The sensor properties as they were dispatched on the sensor name."""
+
+    @property
+    def state(self):
+        sensor = self.entity_description.key
+        if sensor == "stove consumption":
+            return self._stove.get_stove_consumption()
+        elif sensor == "stove runtime":
+            return self._stove.get_stove_runtime()
+        elif sensor == "stove temperature":
+            return self._stove.get_stove_temperature()
+        elif sensor == "stove thermostat":
+            return self._stove.get_stove_thermostat()
+        elif sensor == "stove burning":
+            return self._stove.is_stove_burning()
+        elif sensor == "stove status":
+            return self._stove.get_status_text()
+        elif sensor == "room temperature":
+            return self._stove.get_room_temperature()
+        elif sensor == "room thermostat":
+            return self._stove.get_room_thermostat()
+        elif sensor == "room power request":
+            return self._stove.get_room_power_request()
+        elif sensor == "heating power":
+            return self._stove.get_heating_power()
+
+    @property
+    def extra_state_attributes(self):
+        if self.entity_description.key == "stove status":
+            return {
+                "control_confirmation": self._stove.get_control_confirmation(),
+                "coalesced_writes": self._stove.get_coalesced_writes(),
+            }
+
+    @property
+    def unit_of_measurement(self):
+        sensor = self.entity_description.key
+        if "temperature" in sensor or "thermostat" in sensor:
+            return UnitOfTemperature.CELSIUS
+        elif sensor == "stove consumption":
+            return UnitOfMass.KILOGRAMS
+        elif sensor == "stove runtime":
+            return UnitOfTime.HOURS
+        elif sensor == "heating power":
+            return PERCENTAGE
+
+    @property
+    def icon(self):
+        sensor = self.entity_description.key
+        if "temperature" in sensor or "thermostat" in sensor:
+            return "mdi:thermometer"
+        elif sensor == "stove consumption":
+            return "mdi:weight-kilogram"
+        elif sensor == "stove runtime":
+            return "mdi:timelapse"
+        elif sensor == "stove burning":
+            return "mdi:fire"
+        elif sensor == "stove status":
+            return "mdi:information-outline"
+        elif sensor == "heating power":
+            return "mdi:speedometer"
+
+
+class LegacyNumber(RikaFirenetStoveNumber):
+    """The number properties as they were dispatched on the number name."""
+
+    @property
+    def native_min_value(self):
+        number = self.entity_description.key
+        if number == "room power request":
+            return 1
+        elif number == "convection fan1 level":
+            return 0
+        elif number == "convection fan1 area":
+            return -30
+        elif number == "convection fan2 level":
+            return 0
+        elif number == "convection fan2 area":
+            return -30
+        return 0
+
+    @property
+    def native_max_value(self):
+        number = self.entity_description.key
+        if number == "room power request":
+            return 4
+        elif number == "convection fan1 level":
+            return 5
+        elif number == "convection fan1 area":
+            return 30
+        elif number == "convection fan2 level":
+            return 5
+        elif number == "convection fan2 area":
+            return 30
+        return 100
+
+    @property
+    def native_step(self):
+        number = self.entity_description.key
+        if number == "room power request":
+            return 1
+        elif number == "convection fan1 level":
+            return 1
+        elif number == "convection fan1 area":
+            return 1
+        elif number == "convection fan2 level":
+            return 1
+        elif number == "convection fan2 area":
+            return 1
+        return 10
+
+    @property
+    def native_value(self):
+        number = self.entity_description.key
+        if number == "room power request":
+            return self._stove.get_room_power_request()
+        elif number == "heating power":
+            return self._stove.get_heating_power()
+        elif number == "convection fan1 level":
+            return self._stove.get_convection_fan1_level()
+        elif number == "convection fan1 area":
+            return self._stove.get_convection_fan1_area()
+        elif number == "convection fan2 level":
+            return self._stove.get_convection_fan2_level()
+        elif number == "convection fan2 area":
+            return self._stove.get_convection_fan2_area()
+
+    @property
+    def native_unit_of_measurement(self):
+        number = self.entity_description.key
+        if number == "heating power":
+            return PERCENTAGE
+        elif number == "convection fan1 area":
+            return PERCENTAGE
+        elif number == "convection fan2 area":
+            return PERCENTAGE
+
+    @property
+    def icon(self):
+        return "mdi:speedometer"
+
+
+class LegacySwitch(RikaFirenetStoveBinarySwitch):
+    """The switch properties as they were dispatched on the switch name."""
+
+    @property
+    def icon(self):
+        return "hass:power"
+
+    @property
+    def is_on(self):
+        number = self.entity_description.key
+        if number == "on off":
+            return self._stove.is_stove_on()
+        elif number == "convection fan1":
+            return self._stove.is_stove_convection_fan1_on()
+        elif number == "convection fan2":
+            return self._stove.is_stove_convection_fan2_on()
+
+
+def build_entities(coordinator, stoves, sensor_class, number_class, switch_class):
+    entities = []
+    for index in range(stoves):
+        stove = RikaFirenetStove(coordinator, str(10000 + index), f"Stove {index}")
+        stove._view = StoveSnapshot.from_payload(PAYLOAD)
+        stove._available = True
+        for entity_class, descriptions in (
+            (sensor_class, DEVICE_SENSORS),
+            (number_class, DEVICE_NUMBERS),
+            (switch_class, DEVICE_SWITCH),
+        ):
+            entities.extend(
+                entity_class(None, stove, coordinator, description)
+                for description in descriptions
+                if description.key in LEGACY_KEYS
+            )
+    return entities
+
+
+def read_properties(entities):
+    """Read what a state write of every entity reads of the entity itself."""
+    for entity in entities:
+        entity.state
+        entity.icon
+        entity.unit_of_measurement
+        entity.extra_state_attributes
+        entity.capability_attributes
+
+
+def measure(name, entities, repeat):
+    seconds = min(
+        timeit.repeat(lambda: read_properties(entities), number=1, repeat=repeat)
+    )
+    print(
+        f"{name:<12} {seconds * 1000:10.3f} ms"
+        f" {seconds / len(entities) * 1e6:10.2f} us/entity"
+    )
+    return [
+        (entity.state, entity.icon, entity.unit_of_measurement) for entity in entities
+    ]
+
+
+async def async_main(args):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        coordinator = RikaFirenetCoordinator(hass, "bench", "secret", 21)
+        run(args, coordinator)
+        await hass.async_stop(force=True)
+
+
+def run(args, coordinator):
+    descriptors = build_entities(
+        coordinator,
+        args.stoves,
+        RikaFirenetStoveSensor,
+        RikaFirenetStoveNumber,
+        RikaFirenetStoveBinarySwitch,
+    )
+    legacy = build_entities(
+        coordinator, args.stoves, LegacySensor, LegacyNumber, LegacySwitch
+    )
+    print(f"{args.stoves} stoves, {len(descriptors)} entities per refresh")
+    print(f"{'dispatch':<12} {'refresh':>13} {'per entity':>16}")
+
+    expected = measure("descriptors", descriptors, args.repeat)
+    assert measure("if/elif", legacy, args.repeat) == expected
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=20)
+    arguments.add_argument("--repeat", type=int, default=50)
+    asyncio.run(async_main(arguments.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
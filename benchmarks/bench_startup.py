@@ -0,0 +1,107 @@
+"""Time until the entities of a config entry have a state at startup.
+
+Usage: python benchmarks/bench_startup.py [--stoves N] [--latency S]
+                                         [--request-rate R]
+
+Sets the coordinator up the way async_setup_entry does, twice against the
+fake Firenet server: a first setup without persisted data has to discover
+the stoves and refresh them before entities can be created, a restart
+creates them from the persisted stove list and states and fetches the live
+state in the background. Reported is the time until every stove has a
+state to show and until every stove shows its live state. Needs Home
+Assistant, run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from custom_components.rika_firenet.connection import RikaFirenetConnectionManager
+from custom_components.rika_firenet.const import (
+    DATA_CONNECTION_MANAGER,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from custom_components.rika_firenet.core import RikaFirenetCoordinator
+
+from bench_coordinator import point_client_at
+from fake_firenet import FakeFirenet
+
+
+async def async_start(args, config_dir):
+    """Return the seconds until entities have a state and until it is live."""
+    hass = HomeAssistant(config_dir)
+    hass.data[DATA_CONNECTION_MANAGER] = RikaFirenetConnectionManager(
+        hass, request_rate=args.request_rate
+    )
+    coordinator = RikaFirenetCoordinator(
+        hass,
+        "bench@example.com",
+        "secret",
+        21,
+        store=Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.bench"),
+    )
+    try:
+        start = time.perf_counter()
+        await coordinator.async_setup()
+        if coordinator.has_restored_stoves():
+            first_refresh = asyncio.create_task(coordinator.async_refresh_restored())
+        else:
+            first_refresh = None
+            await coordinator.async_refresh()
+        entities = time.perf_counter() - start
+        if not all(stove.is_available() for stove in coordinator.get_stoves()):
+            entities = float("nan")
+
+        if first_refresh is not None:
+            await first_refresh
+        live = time.perf_counter() - start
+
+        await coordinator.async_shutdown()
+    finally:
+        await hass.async_stop(force=True)
+    return entities, live
+
+
+async def async_main(args):
+    fake = FakeFirenet(stoves=args.stoves, latency=args.latency)
+    point_client_at(await fake.async_start())
+
+    print(
+        f"{args.stoves} stoves, latency {args.latency * 1000:.0f} ms,"
+        f" {args.request_rate:g} requests/s"
+    )
+    print(f"{'setup':<10} {'entities':>10} {'live':>10}")
+    print(f"{'':<10} {'ms':>10} {'ms':>10}")
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            for name in ("first", "restart"):
+                entities, live = await async_start(args, config_dir)
+                print(f"{name:<10} {entities * 1000:>10.1f} {live * 1000:>10.1f}")
+    finally:
+        await fake.async_stop()
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=5)
+    arguments.add_argument("--latency", type=float, default=0.3)
+    arguments.add_argument("--request-rate", type=float, default=5)
+    args = arguments.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Check and time the status lookup table against the former if/elif chain.
+
+Usage: python benchmarks/bench_status_decode.py [--repeat N]
+
+Decodes every main state from -2 to 119 with every sub state from -2 to 19,
+with and without frost protection, once with decode_status and once with
+the if/elif chain get_status used before, and asserts both agree on every
+combination. Needs Home Assistant, run it from the repository root.
+"""
+
+import argparse
+import itertools
+import pathlib
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from custom_components.rika_firenet.snapshot import decode_status
+
+MAIN_STATES = range(-2, 120)
+SUB_STATES = range(-2, 20)
+FROST_STARTED = (False, True)
+
+
+def legacy_status(main_state, sub_state, frost_started):
+    """The status as RikaFirenetStove.get_status decoded it."""
+    if frost_started:
+        return ["/images/status/Visu_Freeze.svg", "frost_protection"]
+
+    if main_state == 1:
+        if sub_state == 0:
+            return ["/images/status/Visu_Off.svg", "stove_off"]
+        elif sub_state == 1:
+            return ["/images/status/Visu_Standby.svg", "standby"]
+        elif sub_state == 2:
+            return ["/images/status/Visu_Standby.svg", "external_request"]
+        elif sub_state == 3:
+            return ["/images/status/Visu_Standby.svg", "standby"]
+        return ["/images/status/Visu_Off.svg", "sub_state_unknown"]
+    elif main_state == 2:
+        return ["/images/status/Visu_Ignition.svg", "ignition_on"]
+    elif main_state == 3:
+        return ["/images/status/Visu_Ignition.svg", "starting_up"]
+    elif main_state == 4:
+        return ["/images/status/Visu_Control.svg", "running"]
+    elif main_state == 5:
+        if sub_state == 3 or sub_state == 4:
+            return ["/images/status/Visu_Clean.svg", "big_clean"]
+        else:
+            return ["/images/status/Visu_Clean.svg", "clean"]
+    elif main_state == 6:
+        return ["/images/status/Visu_BurnOff.svg", "burn_off"]
+    elif (
+        main_state == 11
+        or main_state == 13
+        or main_state == 14
+        or main_state == 16
+        or main_state == 17
+        or main_state == 50
+    ):
+        return ["/images/status/Visu_SpliLog.svg", "split_log_check"]
+    elif main_state == 20 or main_state == 21:
+        return ["/images/status/Visu_SpliLog.svg", "split_log_mode"]
+
+    return ["/images/status/Visu_Off.svg", "unknown"]
+
+
+def decode_all(decode):
+    return [
+        decode(main_state, sub_state, frost_started)
+        for main_state, sub_state, frost_started in itertools.product(
+            MAIN_STATES, SUB_STATES, FROST_STARTED
+        )
+    ]
+
+
+def measure(name, decode, repeat):
+    seconds = min(timeit.repeat(lambda: decode_all(decode), number=1, repeat=repeat))
+    print(f"{name:<12} {seconds * 1000:10.3f} ms")
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--repeat", type=int, default=50)
+    args = arguments.parse_args()
+
+    mismatches = [
+        (combination, list(table), legacy)
+        for combination, table, legacy in zip(
+            itertools.product(MAIN_STATES, SUB_STATES, FROST_STARTED),
+            decode_all(decode_status),
+            decode_all(legacy_status),
+        )
+        if list(table) != legacy
+    ]
+    for (main_state, sub_state, frost_started), table, legacy in mismatches[:10]:
+        print(
+            f"main {main_state} sub {sub_state} frost {frost_started}:"
+            f" table {table}, if/elif {legacy}"
+        )
+    assert not mismatches, f"{len(mismatches)} status combinations differ"
+
+    print(f"{len(decode_all(decode_status))} status combinations match")
+    print(f"{'decoder':<12} {'all':>13}")
+    measure("table", decode_status, args.repeat)
+    measure("if/elif", legacy_status, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
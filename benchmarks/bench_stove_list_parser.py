@@ -0,0 +1,100 @@
+"""Compare the stove list parser with the former BeautifulSoup implementation.
+
+Usage: python benchmarks/bench_stove_list_parser.py [--stoves N] [--padding KB]
+
+Builds a synthetic summary page, then reports the parse time and peak memory
+of both implementations. BeautifulSoup is only needed for the comparison.
+"""
+
+import argparse
+import importlib.util
+import pathlib
+import timeit
+import tracemalloc
+
+PARSER_PATH = (
+    pathlib.Path(__file__).resolve().parents[1]
+    / "custom_components"
+    / "rika_firenet"
+    / "parser.py"
+)
+
+
+def load_parser():
+    # Load the module by path, importing the package would pull in Home Assistant.
+    spec = importlib.util.spec_from_file_location("rika_firenet_parser", PARSER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_page(stoves, padding_kb):
+    filler = '<div class="tile"><span>Firenet</span><p>Lorem ipsum</p></div>\n'
+    filler = filler * (padding_kb * 1024 // len(filler) + 1)
+    items = "\n".join(
+        f'<li><a href="/web/stove/{10000 + i}">Stove {i}</a></li>'
+        for i in range(stoves)
+    )
+    return (
+        f"<html><head><title>Summary</title></head><body>{filler}"
+        f'<ul id="stoveList">{items}</ul>{filler}</body></html>'
+    )
+
+
+def parse_bs4(content):
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+
+    soup = BeautifulSoup(content, "html.parser")
+    stove_list = soup.find("ul", {"id": "stoveList"})
+    stoves = []
+    for stove_element in stove_list.find_all("li"):
+        stove_link = stove_element.find("a", href=True)
+        if not stove_link:
+            continue
+        stoves.append((stove_link.attrs["href"].rsplit("/", 1)[-1], stove_link.text))
+    return stoves
+
+
+def parse_streaming(parser_module, content, chunk_size=4096):
+    parser = parser_module.StoveListParser()
+    for start in range(0, len(content), chunk_size):
+        parser.feed(content[start : start + chunk_size])
+        if parser.done:
+            break
+    return parser.stoves
+
+
+def measure(name, func, repeat):
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {seconds * 1000:10.2f} ms {peak / 1024:10.1f} KiB")
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=50)
+    arguments.add_argument("--padding", type=int, default=256, help="KiB of markup")
+    arguments.add_argument("--repeat", type=int, default=5)
+    args = arguments.parse_args()
+
+    parser_module = load_parser()
+    content = build_page(args.stoves, args.padding)
+    print(f"page: {len(content) / 1024:.0f} KiB, {args.stoves} stoves")
+    print(f"{'parser':<12} {'time':>13} {'peak memory':>14}")
+
+    expected = parse_streaming(parser_module, content)
+    measure("streaming", lambda: parse_streaming(parser_module, content), args.repeat)
+
+    try:
+        assert parse_bs4(content) == expected
+    except ImportError:
+        print("bs4 not installed, skipping the BeautifulSoup comparison")
+        return
+    measure("bs4", lambda: parse_bs4(content), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Check the pellet consumption figures against a whole kg feed counter.
+
+Usage: python benchmarks/check_pellet_consumption.py [--rate KG_H]
+                                                    [--interval S]
+                                                    [--hours H] [--hopper KG]
+
+Feeds PelletConsumption the feed rate total the way a stove reports it, a
+counter of whole kg, polled every interval while the stove burns at a
+constant rate. No rate and no hopper forecast may come out before the
+samples cover the rate window, afterwards the rate must be within one
+counter step per window of the real one. A reset of the counter halfway
+must neither lower the daily usage nor refill the hopper. Needs Home
+Assistant, run it from the repository root.
+"""
+
+import argparse
+import math
+import pathlib
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from custom_components.rika_firenet.const import CONSUMPTION_RATE_WINDOW
+from custom_components.rika_firenet.consumption import PelletConsumption
+
+START = datetime(2024, 1, 15, 6, 0, tzinfo=timezone.utc)
+START_TOTAL = 1234.6  # kg, the stove keeps counting across restarts
+
+
+def counter(args, elapsed, reset_at=None):
+    """Return the whole kg feed counter after elapsed seconds.
+
+    A counter reset at reset_at seconds starts it over from 0.
+    """
+    if reset_at is not None and elapsed >= reset_at:
+        return math.floor(args.rate * (elapsed - reset_at) / 3600)
+    return math.floor(START_TOTAL + args.rate * elapsed / 3600)
+
+
+def run_reset(args):
+    """Reset the counter halfway, the consumed pellets must stay consumed."""
+    consumption = PelletConsumption(timedelta(minutes=CONSUMPTION_RATE_WINDOW))
+    consumption.update(counter(args, 0), START)
+    consumption.set_hopper_fill(args.hopper)
+
+    errors = []
+    reset_at = args.hours * 3600 / 2
+    usage, remaining = 0, args.hopper
+    elapsed = 0
+    while elapsed < args.hours * 3600:
+        elapsed += args.interval
+        now = START + timedelta(seconds=elapsed)
+        consumption.update(counter(args, elapsed, reset_at), now)
+        previous = usage, remaining
+        usage = consumption.get_daily_usage()
+        remaining = consumption.get_hopper_remaining()
+        if usage < previous[0] or remaining > previous[1]:
+            errors.append(
+                f"{elapsed:>6} s: daily usage {previous[0]} -> {usage},"
+                f" remaining {previous[1]} -> {remaining}"
+            )
+
+    print(
+        f"counter reset after {reset_at:g} s:"
+        f" daily usage {usage} kg, remaining {remaining:.1f} kg"
+    )
+    return errors
+
+
+def run(args):
+    window = timedelta(minutes=CONSUMPTION_RATE_WINDOW)
+    consumption = PelletConsumption(window)
+    consumption.update(counter(args, 0), START)
+    consumption.set_hopper_fill(args.hopper)
+
+    errors = []
+    elapsed = 0
+    while elapsed < args.hours * 3600:
+        elapsed += args.interval
+        now = START + timedelta(seconds=elapsed)
+        consumption.update(counter(args, elapsed), now)
+        rate = consumption.get_rate()
+        empty = consumption.get_hopper_empty()
+
+        if elapsed < window.total_seconds():
+            if rate is not None or empty is not None:
+                errors.append(
+                    f"{elapsed:>6} s: rate {rate}, hopper empty {empty}"
+                    " before the window is covered"
+                )
+        elif (
+            rate is None or abs(rate - args.rate) > 3600 / window.total_seconds() + 1e-9
+        ):
+            errors.append(f"{elapsed:>6} s: rate {rate}, burning {args.rate} kg/h")
+
+    print(
+        f"{args.rate:g} kg/h polled every {args.interval} s for {args.hours} h,"
+        f" window {CONSUMPTION_RATE_WINDOW} min"
+    )
+    print(
+        f"rate {consumption.get_rate():.2f} kg/h,"
+        f" remaining {consumption.get_hopper_remaining():.1f} kg,"
+        f" empty {consumption.get_hopper_empty()}"
+    )
+    return errors
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--rate", type=float, default=1.3)
+    arguments.add_argument("--interval", type=int, default=15)
+    arguments.add_argument("--hours", type=float, default=4)
+    arguments.add_argument("--hopper", type=float, default=30)
+    args = arguments.parse_args()
+
+    errors = run(args) + run_reset(args)
+    for error in errors[:10]:
+        print(error)
+    assert not errors, f"{len(errors)} samples with wrong consumption figures"
+
+
+if __name__ == "__main__":
+    main()
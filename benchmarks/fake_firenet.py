@@ -0,0 +1,242 @@
+"""Local stand-in for the Rika Firenet cloud.
+
+Usage: python benchmarks/fake_firenet.py [--stoves N] [--latency S] [--port P]
+
+Implements the endpoints the integration uses: the login form, the summary
+page with the stove list and the /status and /controls API of every stove.
+Responses can be delayed by a latency with jitter and fail at a given rate,
+written controls reach the /status payload after an apply delay like they do
+once the real stove picked them up. Needs aiohttp only.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import secrets
+from collections import Counter
+
+from aiohttp import web
+
+SESSION_COOKIE = "connect.sid"
+SESSION_MAX_AGE = 3600
+FIRST_STOVE_ID = 10000
+
+STOVE_PAYLOAD = {
+    "sensors": {
+        "parameterFeedRateTotal": 1234,
+        "parameterRuntimePellets": 5678,
+        "inputFlameTemperature": 412,
+        "inputRoomTemperature": 21.5,
+        "statusMainState": 4,
+        "statusSubState": 0,
+        "statusFrostStarted": False,
+    },
+    "controls": {
+        "targetTemperature": 22,
+        "operatingMode": 2,
+        "setBackTemperature": 16,
+        "heatingTimesActiveForComfort": True,
+        "onOff": True,
+        "convectionFan1Active": True,
+        "convectionFan2Active": False,
+        "RoomPowerRequest": 3,
+        "convectionFan1Level": 2,
+        "convectionFan1Area": -10,
+        "convectionFan2Level": 0,
+        "convectionFan2Area": 0,
+        "heatingPower": 70,
+    },
+}
+
+
+def _form_value(value):
+    """Turn a form encoded control back into the JSON type of the API."""
+    if value in ("True", "False"):
+        return value == "True"
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+class FakeFirenet:
+    """aiohttp application behaving like the Firenet endpoints."""
+
+    def __init__(
+        self,
+        stoves=1,
+        latency=0.0,
+        jitter=0.0,
+        failure_rate=0.0,
+        apply_delay=0.0,
+        username="bench@example.com",
+        password="secret",
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.apply_delay = apply_delay
+        self.requests = Counter()
+        self.failures = Counter()
+        # Most /controls POSTs of one stove handled at the same time
+        self.max_concurrent_writes = 0
+        self._writes_in_flight = Counter()
+        self._username = username
+        self._password = password
+        self._random = random.Random(seed)
+        self._sessions = set()
+        self._stoves = {}
+        for index in range(stoves):
+            payload = copy.deepcopy(STOVE_PAYLOAD)
+            payload["sensors"]["inputRoomTemperature"] += index % 5
+            self._stoves[str(FIRST_STOVE_ID + index)] = payload
+        self._runner = None
+
+    def create_app(self):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/web/login", self._login_form)
+        app.router.add_post("/web/login", self._login)
+        app.router.add_get("/web/summary", self._summary)
+        app.router.add_get("/api/client/{stove_id}/status", self._status)
+        app.router.add_post("/api/client/{stove_id}/controls", self._controls)
+        return app
+
+    async def async_start(self, host="localhost", port=0):
+        """Serve in the running loop and return the base URL."""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def async_stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def get_stove_ids(self):
+        return list(self._stoves)
+
+    def get_controls(self, stove_id):
+        """Return the controls a stove applied so far."""
+        return dict(self._stoves[stove_id]["controls"])
+
+    def expire_sessions(self):
+        """Forget every session, like the cloud does now and then."""
+        self._sessions.clear()
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        endpoint = request.match_info.route.resource.canonical
+        self.requests[endpoint] += 1
+
+        writing = request.method == "POST" and endpoint.endswith("/controls")
+        stove_id = request.match_info.get("stove_id")
+        if writing:
+            self._writes_in_flight[stove_id] += 1
+            self.max_concurrent_writes = max(
+                self.max_concurrent_writes, self._writes_in_flight[stove_id]
+            )
+        try:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                self.failures[endpoint] += 1
+                raise web.HTTPServiceUnavailable()
+
+            return await handler(request)
+        finally:
+            if writing:
+                self._writes_in_flight[stove_id] -= 1
+
+    def _is_logged_in(self, request):
+        return request.cookies.get(SESSION_COOKIE) in self._sessions
+
+    def _get_stove(self, request):
+        if not self._is_logged_in(request):
+            raise web.HTTPUnauthorized()
+        try:
+            return self._stoves[request.match_info["stove_id"]]
+        except KeyError:
+            raise web.HTTPNotFound() from None
+
+    async def _login_form(self, request):
+        return web.Response(text="<form method='post'>login</form>")
+
+    async def _login(self, request):
+        data = await request.post()
+        if data.get("email") != self._username or data.get("password") != (
+            self._password
+        ):
+            return web.Response(text="<form method='post'>login</form>")
+
+        session = secrets.token_hex(16)
+        self._sessions.add(session)
+        response = web.Response(text="<a href='/web/logout'>Logout</a>")
+        response.set_cookie(SESSION_COOKIE, session, max_age=SESSION_MAX_AGE)
+        return response
+
+    async def _summary(self, request):
+        if not self._is_logged_in(request):
+            raise web.HTTPFound("/web/login")
+
+        items = "".join(
+            f'<li><a href="/web/stove/{stove_id}">Stove {stove_id}</a></li>'
+            for stove_id in self._stoves
+        )
+        return web.Response(
+            text=f'<html><body><ul id="stoveList">{items}</ul></body></html>',
+            content_type="text/html",
+        )
+
+    async def _status(self, request):
+        stove = self._get_stove(request)
+        return web.Response(text=json.dumps(stove), content_type="application/json")
+
+    async def _controls(self, request):
+        stove = self._get_stove(request)
+        data = await request.post()
+        controls = {key: _form_value(value) for key, value in data.items()}
+
+        if self.apply_delay > 0:
+            asyncio.get_running_loop().call_later(
+                self.apply_delay, stove["controls"].update, controls
+            )
+        else:
+            stove["controls"].update(controls)
+
+        return web.Response(text="OK")
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--stoves", type=int, default=1)
+    arguments.add_argument("--latency", type=float, default=0.0)
+    arguments.add_argument("--jitter", type=float, default=0.0)
+    arguments.add_argument("--failure-rate", type=float, default=0.0)
+    arguments.add_argument("--apply-delay", type=float, default=0.0)
+    arguments.add_argument("--host", default="localhost")
+    arguments.add_argument("--port", type=int, default=8080)
+    args = arguments.parse_args()
+
+    fake = FakeFirenet(
+        stoves=args.stoves,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        apply_delay=args.apply_delay,
+    )
+    print(f"Serving {args.stoves} stoves, login bench@example.com / secret")
+    web.run_app(fake.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
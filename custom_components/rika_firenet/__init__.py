@@ -1,18 +1,38 @@
 import logging
-import requests.exceptions
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.storage import Store
 
 from .const import (
     CONF_DEFAULT_TEMPERATURE,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_HISTORY_RETENTION,
+    CONF_HISTORY_SIZE,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_REQUESTS_PER_MINUTE,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
     CONF_PASSWORD,
     CONF_USERNAME,
+    CONF_WRITE_COALESCE_WINDOW,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_WRITE_COALESCE_WINDOW,
     DOMAIN,
     PLATFORMS,
     STARTUP_MESSAGE,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
 from .core import RikaFirenetCoordinator
+from .services import async_setup_services
 from .exceptions import (
     RikaAuthenticationError,
     RikaConnectionError,
@@ -25,9 +45,103 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: dict):
     _LOGGER.info("setup_platform()")
+    async_setup_services(hass)
+    return True
+
+
+def _get_coordinator_options(entry: ConfigEntry):
+    """Return the options the coordinator applies while running."""
+    options = entry.options
+    return {
+        "default_temperature": int(options.get(CONF_DEFAULT_TEMPERATURE, 21)),
+        "max_concurrent_requests": int(
+            options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS)
+        ),
+        "write_coalesce_window": float(
+            options.get(CONF_WRITE_COALESCE_WINDOW, DEFAULT_WRITE_COALESCE_WINDOW)
+        ),
+        "min_scan_interval": int(
+            options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+        ),
+        "max_scan_interval": int(
+            options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+        ),
+        "max_requests_per_minute": int(
+            options.get(CONF_MAX_REQUESTS_PER_MINUTE, DEFAULT_MAX_REQUESTS_PER_MINUTE)
+        ),
+        "history_size": int(options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE)),
+        "history_retention": float(
+            options.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION)
+        ),
+    }
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Migrate an entry created by an older version of the integration."""
+    if entry.version > 2:
+        return False
+
+    if entry.version == 1:
+        # Entries of version 1 have no unique id, the config flow could not
+        # tell an account was already configured.
+        unique_id = entry.data[CONF_USERNAME].lower()
+        if any(
+            other.unique_id == unique_id
+            for other in hass.config_entries.async_entries(DOMAIN)
+        ):
+            _LOGGER.warning("Account %s is configured more than once", unique_id)
+            unique_id = None
+        hass.config_entries.async_update_entry(entry, unique_id=unique_id, version=2)
+
     return True
 
 
+@callback
+def _async_migrate_unique_ids(hass: HomeAssistant, entry: ConfigEntry, stoves):
+    """Move "<key> <stove name>" unique ids to "<stove id> <key>".
+
+    Stove names are not unique across accounts, the stove ids are.
+    """
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    stove_ids = {stove.get_id() for stove in stoves}
+    # Longest names first, stove "Two" must not take the entities of "My Two".
+    stoves = sorted(stoves, key=lambda stove: len(stove.get_name()), reverse=True)
+
+    for registry_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        old_id = registry_entry.unique_id
+        if old_id.partition(" ")[0] in stove_ids | {entry.entry_id}:
+            continue
+        for stove in stoves:
+            key = old_id.removesuffix(f" {stove.get_name()}")
+            if key != old_id:
+                break
+        else:
+            continue
+
+        new_id = f"{stove.get_id()} {key}"
+        _LOGGER.info("Migrating unique id %s to %s", old_id, new_id)
+        try:
+            entity_registry.async_update_entity(
+                registry_entry.entity_id, new_unique_id=new_id
+            )
+        except ValueError as exception:
+            _LOGGER.warning("Cannot migrate unique id %s: %s", old_id, exception)
+            continue
+
+        device = device_registry.async_get_device(identifiers={(DOMAIN, old_id)})
+        if device is not None:
+            device_registry.async_update_device(
+                device.id, new_identifiers={(DOMAIN, new_id)}
+            )
+
+
+def _get_platforms(entry: ConfigEntry):
+    return [platform for platform in PLATFORMS if entry.options.get(platform, True)]
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.info("async_setup_entry(): %s", entry.entry_id)
 
@@ -37,12 +151,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     username = entry.data.get(CONF_USERNAME)
     password = entry.data.get(CONF_PASSWORD)
-    default_temperature = int(entry.options.get(CONF_DEFAULT_TEMPERATURE, 21))
 
-    coordinator = RikaFirenetCoordinator(hass, username, password, default_temperature)
+    coordinator = RikaFirenetCoordinator(
+        hass,
+        username,
+        password,
+        store=Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}"),
+        **_get_coordinator_options(entry),
+    )
 
     try:
-        await hass.async_add_executor_job(coordinator.setup)
+        await coordinator.async_setup()
     except RikaAuthenticationError as exception:
         _LOGGER.error("Authentication failed: %s", exception)
         return False
@@ -56,17 +175,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         _LOGGER.error("Invalid response from Rika Firenet: %s", exception)
         raise ConfigEntryNotReady from exception
 
-    await coordinator.async_refresh()
+    # Stoves set up from the persisted list start from their persisted state,
+    # a first setup has nothing to show before the first refresh.
+    if not coordinator.has_restored_stoves():
+        await coordinator.async_refresh()
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
 
+    _async_migrate_unique_ids(hass, entry, coordinator.get_stoves())
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    coordinator.platforms = [p for p in PLATFORMS if entry.options.get(p, True)]
+    coordinator.platforms = _get_platforms(entry)
+    coordinator.diagnostic_sensors = entry.options.get(CONF_DIAGNOSTIC_SENSORS, False)
     await hass.config_entries.async_forward_entry_setups(entry, coordinator.platforms)
 
-    entry.add_update_listener(async_reload_entry)
+    if coordinator.has_restored_stoves():
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh_restored(), f"{DOMAIN} first refresh"
+        )
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
@@ -81,11 +210,32 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
 
     return unloaded
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the persisted data of an entry."""
+    await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}").async_remove()
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
+    """Apply changed options, reload the entry only when platforms change.
+
+    Intervals, limits and the default temperature change in place. Enabled
+    platforms and the diagnostic sensors need a reload: unloading a single
+    platform also runs the unload callbacks of the entry, which shut the
+    coordinator and its session down.
+    """
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostic_sensors = entry.options.get(CONF_DIAGNOSTIC_SENSORS, False)
+    if (
+        coordinator.platforms != _get_platforms(entry)
+        or coordinator.diagnostic_sensors != diagnostic_sensors
+    ):
+        _LOGGER.debug("Platforms changed, reloading %s", entry.entry_id)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    coordinator.async_set_options(**_get_coordinator_options(entry))
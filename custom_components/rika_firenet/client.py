@@ -0,0 +1,371 @@
+import asyncio
+import codecs
+import email.utils
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager, nullcontext
+from http.cookies import SimpleCookie
+
+import aiohttp
+from homeassistant.util.json import json_loads
+from yarl import URL
+
+from .const import (
+    API_BASE_URL,
+    API_CLIENT_URL,
+    API_LOGIN_URL,
+    API_STOVES_URL,
+    DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    HTTP_TIMEOUT,
+    REQUEST_BUDGET_BURST,
+)
+from .connection import PRIORITY_COMMAND, PRIORITY_POLL, CircuitBreaker, TokenBucket
+from .exceptions import (
+    RikaApiError,
+    RikaAuthenticationError,
+    RikaConnectionError,
+    RikaTimeoutError,
+)
+from .metrics import (
+    ENDPOINT_CONTROLS,
+    ENDPOINT_LOGIN,
+    ENDPOINT_STATUS,
+    ENDPOINT_SUMMARY,
+    RikaFirenetMetrics,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Control writes and the logins they may need go before the status polls.
+ENDPOINT_PRIORITIES = {
+    ENDPOINT_LOGIN: PRIORITY_COMMAND,
+    ENDPOINT_CONTROLS: PRIORITY_COMMAND,
+}
+
+SESSION_COOKIE = "connect.sid"
+SESSION_REJECTED_STATUSES = (401, 403)
+STOVE_LIST_CHUNK_SIZE = 4096
+
+
+class RikaFirenetClient:
+    """Asynchronous client for the Rika Firenet cloud API."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        username,
+        password,
+        session_listener=None,
+        connection_manager=None,
+        metrics=None,
+        max_requests_per_minute=DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    ):
+        self._session = session
+        self._username = username
+        self._password = password
+        self._session_listener = session_listener
+        self._connection_manager = connection_manager
+        self._metrics = metrics if metrics is not None else RikaFirenetMetrics()
+        self._circuit_breaker = CircuitBreaker()
+        self._request_budget = TokenBucket(
+            max_requests_per_minute / 60,
+            min(REQUEST_BUDGET_BURST, max_requests_per_minute),
+        )
+        self._timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        self._login_lock = asyncio.Lock()
+        self._session_expires = None
+
+    def is_authenticated(self):
+        # The cookie jar drops cookies it knows to be expired by itself.
+        if self._get_session_cookie() is None:
+            return False
+
+        return self._session_expires is None or self._session_expires > time.time()
+
+    def _get_session_cookie(self):
+        for cookie in self._session.cookie_jar:
+            if cookie.key == SESSION_COOKIE:
+                return cookie
+        return None
+
+    def _get_session_cookie_value(self):
+        cookie = self._get_session_cookie()
+        return None if cookie is None else cookie.value
+
+    def get_session(self):
+        """Return the session cookie and its expiry so it can be persisted."""
+        cookie = self._get_session_cookie()
+        if cookie is None:
+            return None
+        return {"cookie": cookie.value, "expires": self._session_expires}
+
+    def restore_session(self, session):
+        """Reuse a persisted session cookie, it is proven by the next request."""
+        if not session:
+            return
+
+        expires = session.get("expires")
+        if expires is not None and expires <= time.time():
+            _LOGGER.debug("Persisted Rika Firenet session expired")
+            return
+
+        cookie = SimpleCookie()
+        cookie[SESSION_COOKIE] = session["cookie"]
+        if expires is not None:
+            cookie[SESSION_COOKIE]["max-age"] = str(int(expires - time.time()))
+
+        self._session.cookie_jar.update_cookies(cookie, URL(API_BASE_URL))
+        self._session_expires = expires
+        _LOGGER.debug("Restored persisted Rika Firenet session")
+
+    def get_circuit_breaker(self):
+        return self._circuit_breaker
+
+    def set_max_requests_per_minute(self, max_requests_per_minute):
+        self._request_budget.set_rate(
+            max_requests_per_minute / 60,
+            min(REQUEST_BUDGET_BURST, max_requests_per_minute),
+        )
+
+    @asynccontextmanager
+    async def _request_slot(self, endpoint):
+        """Budget one HTTP request and tell the circuit breaker how it went.
+
+        Fails fast with RikaCircuitOpenError while the cloud is failing,
+        before waiting for the per account or global request budget. Control
+        writes are handed the budget before status polls waiting for it.
+        """
+        self._circuit_breaker.before_request()
+        priority = ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_POLL)
+        start = time.monotonic()
+        try:
+            await self._request_budget.async_acquire(priority)
+            if self._connection_manager is None:
+                slot = nullcontext()
+            else:
+                slot = self._connection_manager.async_request_slot(priority)
+            async with slot:
+                self._metrics.record_queue_wait(endpoint, time.monotonic() - start)
+                yield
+        except Exception as exception:
+            if _is_outage(exception):
+                self._circuit_breaker.record_failure()
+            else:
+                # The cloud answered, just not what was asked for.
+                self._circuit_breaker.record_success()
+            raise
+        except BaseException:
+            self._circuit_breaker.release()
+            raise
+        self._circuit_breaker.record_success()
+
+    async def async_connect(self):
+        if self.is_authenticated():
+            return
+
+        # Stoves are polled concurrently, make sure only one of them logs in.
+        async with self._login_lock:
+            if not self.is_authenticated():
+                await self._async_login()
+
+    async def _async_login(self):
+        data = {"email": self._username, "password": self._password}
+
+        try:
+            async with self._request_slot(ENDPOINT_LOGIN):
+                with self._metrics.measure(ENDPOINT_LOGIN):
+                    async with self._session.post(
+                        API_LOGIN_URL, data=data, timeout=self._timeout
+                    ) as response:
+                        response.raise_for_status()
+                        text = await response.text()
+        except asyncio.TimeoutError as exception:
+            raise RikaTimeoutError("Timeout connecting to Rika Firenet") from exception
+        except aiohttp.ClientError as exception:
+            raise RikaConnectionError(
+                f"Failed to connect to Rika Firenet: {exception}"
+            ) from exception
+
+        if response.status != 200 or "/logout" not in text:
+            raise RikaAuthenticationError(
+                "Authentication failed - invalid credentials or server error"
+            )
+
+        _LOGGER.debug("Connected to Rika Firenet")
+
+        cookie = self._get_session_cookie()
+        self._session_expires = _get_cookie_expiry(cookie) if cookie else None
+
+        if self._session_listener is not None:
+            self._session_listener(self.get_session())
+
+    async def _async_request(self, endpoint, method, url, reader=None, **kwargs):
+        """Send an authenticated request and return the response body.
+
+        A rejected session, e.g. a restored cookie the server no longer
+        knows, is dropped and the request is retried once after a login.
+        When another request already replaced the session meanwhile, the
+        retry uses the new one instead. A reader coroutine can consume the response instead of reading it
+        completely.
+        """
+        for attempt in range(2):
+            await self.async_connect()
+
+            session_cookie = None
+            try:
+                async with self._request_slot(endpoint):
+                    session_cookie = self._get_session_cookie_value()
+                    with self._metrics.measure(endpoint):
+                        async with self._session.request(
+                            method, url, timeout=self._timeout, **kwargs
+                        ) as response:
+                            if _is_session_rejected(response):
+                                raise _SessionRejected
+                            response.raise_for_status()
+                            if reader is not None:
+                                return await reader(response)
+                            return await response.read()
+            except _SessionRejected:
+                pass
+
+            if self._get_session_cookie_value() != session_cookie:
+                # A concurrent request logged in again, keep its session.
+                _LOGGER.debug("Rika Firenet session renewed meanwhile")
+                continue
+
+            _LOGGER.debug("Rika Firenet session rejected (attempt %d)", attempt + 1)
+            self._metrics.record_session_retry()
+            self._session.cookie_jar.clear()
+
+        raise RikaAuthenticationError("Session rejected by Rika Firenet")
+
+    async def async_get_stoves(self):
+        """Return the (id, name) pairs of the stoves linked to the account.
+
+        None when the page has no stove list at all, unlike an empty list it
+        says nothing about which stoves the account has.
+        """
+        try:
+            stoves = await self._async_request(
+                ENDPOINT_SUMMARY, "GET", API_STOVES_URL, reader=_async_read_stove_list
+            )
+        except asyncio.TimeoutError as exception:
+            raise RikaTimeoutError("Timeout getting stove list") from exception
+        except aiohttp.ClientError as exception:
+            raise RikaApiError(f"Failed to get stove list: {exception}") from exception
+
+        if stoves is None:
+            _LOGGER.warning("No stove list found in account page")
+
+        return stoves
+
+    async def async_get_stove_state(self, stove_id):
+        data, _ = await self.async_get_stove_state_if_changed(stove_id)
+        return data
+
+    async def async_get_stove_state_if_changed(self, stove_id, digest=None):
+        """Return the /status payload and its digest.
+
+        The payload is None, without being decoded, when the digest of the
+        response equals the given digest of a previous response.
+        """
+        url = f"{API_CLIENT_URL}/{stove_id}/status?nocache={int(time.time())}"
+
+        try:
+            body = await self._async_request(ENDPOINT_STATUS, "GET", url)
+            new_digest = hashlib.blake2b(body, digest_size=16).digest()
+            if new_digest == digest:
+                _LOGGER.debug("get_stove_state() for %s: unchanged", stove_id)
+                return None, digest
+            data = json_loads(body)
+        except asyncio.TimeoutError as exception:
+            raise RikaTimeoutError(
+                f"Timeout getting stove state for {stove_id}"
+            ) from exception
+        except aiohttp.ClientError as exception:
+            raise RikaApiError(f"Failed to get stove state: {exception}") from exception
+        except ValueError as exception:
+            raise RikaApiError(f"Invalid JSON response: {exception}") from exception
+
+        _LOGGER.debug("get_stove_state() for %s: %s", stove_id, data)
+        return data, new_digest
+
+    async def async_set_stove_controls(self, stove_id, data):
+        _LOGGER.debug("set_stove_control() id: %s data: %s", stove_id, data)
+
+        url = f"{API_CLIENT_URL}/{stove_id}/controls"
+        # Form-encode the same way the previous requests based client did.
+        form = {key: str(value) for key, value in data.items()}
+
+        try:
+            text = (
+                await self._async_request(ENDPOINT_CONTROLS, "POST", url, data=form)
+            ).decode()
+        except asyncio.TimeoutError as exception:
+            raise RikaTimeoutError(
+                f"Timeout setting stove controls for {stove_id}"
+            ) from exception
+        except aiohttp.ClientError as exception:
+            raise RikaApiError(
+                f"Failed to set stove controls: {exception}"
+            ) from exception
+
+        # Whether the stove actually applied the values is tracked by the
+        # stove against the following /status payloads.
+        accepted = "OK" in text
+        _LOGGER.debug("Stove controls accepted: %s", accepted)
+        return accepted
+
+
+async def _async_read_stove_list(response):
+    """Parse the stove list while the summary page downloads."""
+    # Only discovery needs the parser, keep it off the integration import path.
+    from .parser import StoveListParser  # pylint: disable=import-outside-toplevel
+
+    parser = StoveListParser()
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")("replace")
+
+    async for chunk in response.content.iter_chunked(STOVE_LIST_CHUNK_SIZE):
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+
+    return parser.stoves
+
+
+def _is_outage(exception):
+    """Return whether a request failed because the cloud is unreachable."""
+    if isinstance(exception, aiohttp.ClientResponseError):
+        return exception.status >= 500
+    return isinstance(
+        exception,
+        (
+            asyncio.TimeoutError,
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+        ),
+    )
+
+
+class _SessionRejected(Exception):
+    """The server asked for a login instead of answering the request."""
+
+
+def _is_session_rejected(response):
+    if response.status in SESSION_REJECTED_STATUSES:
+        return True
+    # The web pages redirect to the login form instead.
+    return response.url.path == URL(API_LOGIN_URL).path
+
+
+def _get_cookie_expiry(cookie):
+    """Return the expiry of a fresh cookie as epoch seconds, None if it has none."""
+    if cookie["max-age"]:
+        return time.time() + int(cookie["max-age"])
+    if cookie["expires"]:
+        return email.utils.parsedate_to_datetime(cookie["expires"]).timestamp()
+    return None
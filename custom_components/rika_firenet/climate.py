@@ -4,8 +4,14 @@ from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import HVACMode, ClimateEntityFeature
 
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
-
-from .const import DOMAIN, SUPPORT_PRESET
+from homeassistant.core import callback
+
+from .const import (
+    ATTR_COALESCED_WRITES,
+    ATTR_CONTROL_CONFIRMATION,
+    DOMAIN,
+    SUPPORT_PRESET,
+)
 from .core import RikaFirenetCoordinator
 from .entity import RikaFirenetEntity
 from .exceptions import RikaValidationError
@@ -32,10 +38,26 @@ async def async_setup_entry(hass, entry, async_add_entities):
         stove_entities.append(RikaFirenetStoveClimate(entry, stove, coordinator))
 
     if stove_entities:
-        async_add_entities(stove_entities, True)
+        async_add_entities(stove_entities)
+
+    @callback
+    def async_add_stove(stove):
+        async_add_entities([RikaFirenetStoveClimate(entry, stove, coordinator)])
+
+    entry.async_on_unload(coordinator.async_add_stove_listener(async_add_stove))
 
 
 class RikaFirenetStoveClimate(RikaFirenetEntity, ClimateEntity):
+    _fields = frozenset(
+        {
+            "room_temperature",
+            "room_thermostat",
+            "on_off",
+            "operation_mode",
+            "heating_times_active_for_comfort",
+            ATTR_CONTROL_CONFIRMATION,
+        }
+    )
 
     @property
     def current_temperature(self):
@@ -56,10 +78,10 @@ class RikaFirenetStoveClimate(RikaFirenetEntity, ClimateEntity):
         """Return a list of available preset modes."""
         return SUPPORT_PRESET
 
-    def set_preset_mode(self, preset_mode):
+    async def async_set_preset_mode(self, preset_mode):
         """Set new preset mode."""
-        self._stove.set_presence(preset_mode)
-        self.schedule_update_ha_state()
+        await self._stove.async_set_presence(preset_mode)
+        self.async_write_ha_state()
 
     @property
     def target_temperature(self):
@@ -78,10 +100,18 @@ class RikaFirenetStoveClimate(RikaFirenetEntity, ClimateEntity):
     def hvac_modes(self):
         return HVAC_MODES
 
-    def set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         _LOGGER.debug("set_hvac_mode(): %s", hvac_mode)
-        self._stove.set_hvac_mode(str(hvac_mode))
-        self.schedule_update_ha_state()
+        await self._stove.async_set_hvac_mode(str(hvac_mode))
+        self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            ATTR_CONTROL_CONFIRMATION: self._stove.get_control_confirmation(),
+            ATTR_COALESCED_WRITES: self._stove.get_coalesced_writes(),
+            **(super().extra_state_attributes or {}),
+        }
 
     @property
     def supported_features(self):
@@ -91,7 +121,7 @@ class RikaFirenetStoveClimate(RikaFirenetEntity, ClimateEntity):
     def temperature_unit(self):
         return UnitOfTemperature.CELSIUS
 
-    def set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         if kwargs.get(ATTR_TEMPERATURE) is None:
             _LOGGER.warning("Temperature value not provided")
             return
@@ -112,5 +142,5 @@ class RikaFirenetStoveClimate(RikaFirenetEntity, ClimateEntity):
             )
 
         _LOGGER.debug("set_temperature(): %s", temperature)
-        self._stove.set_stove_temperature(int(temperature))
-        self.schedule_update_ha_state()
+        await self._stove.async_set_stove_temperature(int(temperature))
+        self.async_write_ha_state()
@@ -5,12 +5,28 @@ from homeassistant.core import callback
 
 from .const import (
     CONF_DEFAULT_TEMPERATURE,
+    CONF_HISTORY_RETENTION,
+    CONF_HISTORY_SIZE,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_REQUESTS_PER_MINUTE,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
     CONF_PASSWORD,
     CONF_USERNAME,
+    CONF_WRITE_COALESCE_WINDOW,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_WRITE_COALESCE_WINDOW,
     DOMAIN,
     PLATFORMS,
 )
-from .core import RikaFirenetCoordinator
+from .client import RikaFirenetClient
+from .connection import async_get_connection_manager
 from .exceptions import (
     RikaAuthenticationError,
     RikaConnectionError,
@@ -22,7 +38,7 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class RikaFirenetFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
     def __init__(self):
@@ -33,11 +49,18 @@ class RikaFirenetFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle a flow initialized by the user."""
         self._errors = {}
 
-        # Uncomment the next 2 lines if only a single instance of the integration is allowed:
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         if user_input is not None:
+            # Every Firenet account can be added once.
+            username = user_input[CONF_USERNAME].lower()
+            await self.async_set_unique_id(username)
+            self._abort_if_unique_id_configured()
+            # Entries that could not be migrated have no unique id.
+            if any(
+                entry.data.get(CONF_USERNAME, "").lower() == username
+                for entry in self._async_current_entries()
+            ):
+                return self.async_abort(reason="already_configured")
+
             valid = await self._test_credentials(
                 user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
             )
@@ -80,11 +103,14 @@ class RikaFirenetFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _test_credentials(self, username, password):
         """Return true if credentials is valid."""
+        # Logging in is enough, stoves are discovered when the entry is set up.
+        connection_manager = async_get_connection_manager(self.hass)
+        session = connection_manager.async_create_session(auto_cleanup=False)
         try:
-            coordinator = RikaFirenetCoordinator(
-                self.hass, username, password, 21, True
+            client = RikaFirenetClient(
+                session, username, password, connection_manager=connection_manager
             )
-            await self.hass.async_add_executor_job(coordinator.setup)
+            await client.async_connect()
             return True
         except RikaAuthenticationError as exception:
             _LOGGER.error("Authentication failed: %s", exception)
@@ -98,6 +124,8 @@ class RikaFirenetFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         except Exception as exception:
             _LOGGER.exception("Unexpected error testing credentials: %s", exception)
             return False
+        finally:
+            session.detach()
 
 
 class RikaFirenetOptionsFlowHandler(config_entries.OptionsFlow):
@@ -122,7 +150,51 @@ class RikaFirenetOptionsFlowHandler(config_entries.OptionsFlow):
             vol.Required(
                 CONF_DEFAULT_TEMPERATURE,
                 default=self.options.get(CONF_DEFAULT_TEMPERATURE),
-            ): int
+            ): int,
+            vol.Required(
+                CONF_MAX_CONCURRENT_REQUESTS,
+                default=self.options.get(
+                    CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                ),
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Required(
+                CONF_WRITE_COALESCE_WINDOW,
+                default=self.options.get(
+                    CONF_WRITE_COALESCE_WINDOW, DEFAULT_WRITE_COALESCE_WINDOW
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+            vol.Required(
+                CONF_MIN_SCAN_INTERVAL,
+                default=self.options.get(
+                    CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+                ),
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Required(
+                CONF_MAX_SCAN_INTERVAL,
+                default=self.options.get(
+                    CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                ),
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Required(
+                CONF_MAX_REQUESTS_PER_MINUTE,
+                default=self.options.get(
+                    CONF_MAX_REQUESTS_PER_MINUTE, DEFAULT_MAX_REQUESTS_PER_MINUTE
+                ),
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Required(
+                CONF_HISTORY_SIZE,
+                default=self.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE),
+            ): vol.All(int, vol.Range(min=2)),
+            vol.Required(
+                CONF_HISTORY_RETENTION,
+                default=self.options.get(
+                    CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+            vol.Required(
+                CONF_DIAGNOSTIC_SENSORS,
+                default=self.options.get(CONF_DIAGNOSTIC_SENSORS, False),
+            ): bool,
         }
 
         schema_properties.update(
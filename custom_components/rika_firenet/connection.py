@@ -0,0 +1,232 @@
+"""HTTP connection management shared by every Rika Firenet account."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_TIMEOUT,
+    DATA_CONNECTION_MANAGER,
+    GLOBAL_MAX_CONCURRENT_REQUESTS,
+    GLOBAL_REQUEST_BURST,
+    GLOBAL_REQUEST_RATE,
+)
+from .exceptions import RikaCircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Request priorities, lower goes first
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+
+class PrioritySemaphore:
+    """Semaphore handing free slots to the waiter with the best priority.
+
+    Waiters with the same priority are served in arrival order.
+    """
+
+    def __init__(self, value=1):
+        self._value = value
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    async def async_acquire(self, priority=PRIORITY_POLL):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Handed a slot but cancelled before taking it, pass it on.
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            # Cancelled waiters are skipped here instead of searched for.
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def async_hold(self, priority=PRIORITY_POLL):
+        await self.async_acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second with bursts of ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        # Waiters are served by priority, then in order, so a burst of polls
+        # doesn't starve earlier ones and a command doesn't wait behind them.
+        self._lock = PrioritySemaphore()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def set_rate(self, rate, capacity):
+        self._refill()
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = min(self._tokens, capacity)
+
+    async def async_acquire(self, priority=PRIORITY_POLL):
+        """Wait until a token is available and take it."""
+        async with self._lock.async_hold(priority):
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class CircuitBreaker:
+    """Stop sending requests to a cloud that keeps failing.
+
+    After ``failure_threshold`` failures in a row the circuit opens and every
+    request fails fast. Once ``reset_timeout`` passed a single request probes
+    the cloud, its outcome closes the circuit or opens it again.
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = self.STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trips = 0
+        self._rejections = 0
+
+    def get_state(self):
+        return self._state
+
+    def before_request(self):
+        """Raise RikaCircuitOpenError unless a request may be sent now."""
+        if self._state == self.STATE_CLOSED:
+            return
+
+        if (
+            self._state == self.STATE_OPEN
+            and time.monotonic() - self._opened_at >= self._reset_timeout
+        ):
+            _LOGGER.debug("Circuit half open, probing Rika Firenet")
+            self._state = self.STATE_HALF_OPEN
+            return
+
+        self._rejections += 1
+        raise RikaCircuitOpenError(
+            "Rika Firenet is failing, not sending requests for now"
+        )
+
+    def record_success(self):
+        if self._state != self.STATE_CLOSED:
+            _LOGGER.info("Rika Firenet is responding again, closing circuit")
+        self._state = self.STATE_CLOSED
+        self._failures = 0
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.STATE_HALF_OPEN or (
+            self._state == self.STATE_CLOSED
+            and self._failures >= self._failure_threshold
+        ):
+            _LOGGER.warning(
+                "Rika Firenet failed %d times in a row, pausing requests for %d s",
+                self._failures,
+                self._reset_timeout,
+            )
+            self._state = self.STATE_OPEN
+            self._opened_at = time.monotonic()
+            self._trips += 1
+
+    def release(self):
+        """Forget a probe that ended without an outcome, e.g. cancelled."""
+        if self._state == self.STATE_HALF_OPEN:
+            self._state = self.STATE_OPEN
+
+    def as_dict(self):
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "trips": self._trips,
+            "rejections": self._rejections,
+        }
+
+
+class RikaFirenetConnectionManager:
+    """Budget the requests of all accounts against the Firenet cloud.
+
+    Every account gets its own session, so its own cookie jar, on top of the
+    connection pool of Home Assistant: accounts reuse the same kept alive
+    connections instead of opening their own. A global concurrency limit and
+    request rate keep a site with several accounts from overrunning the cloud.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent_requests=GLOBAL_MAX_CONCURRENT_REQUESTS,
+        request_rate=GLOBAL_REQUEST_RATE,
+        request_burst=GLOBAL_REQUEST_BURST,
+    ):
+        self._hass = hass
+        self._semaphore = PrioritySemaphore(max_concurrent_requests)
+        self._bucket = TokenBucket(request_rate, request_burst)
+
+    @callback
+    def async_create_session(self, auto_cleanup=True):
+        """Create a session with its own cookie jar on the shared pool."""
+        return async_create_clientsession(self._hass, auto_cleanup=auto_cleanup)
+
+    @asynccontextmanager
+    async def async_request_slot(self, priority=PRIORITY_POLL):
+        """Hold one of the global request slots for a single HTTP request."""
+        async with self._semaphore.async_hold(priority):
+            await self._bucket.async_acquire(priority)
+            yield
+
+
+@callback
+def async_get_connection_manager(hass: HomeAssistant) -> RikaFirenetConnectionManager:
+    """Return the connection manager shared by all config entries."""
+    manager = hass.data.get(DATA_CONNECTION_MANAGER)
+    if manager is None:
+        _LOGGER.debug("Creating the Rika Firenet connection manager")
+        manager = hass.data[DATA_CONNECTION_MANAGER] = RikaFirenetConnectionManager(
+            hass
+        )
+    return manager
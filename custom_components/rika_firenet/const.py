@@ -5,6 +5,14 @@ CONF_ENABLED = "enabled"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_DEFAULT_TEMPERATURE = "defaultTemperature"
+CONF_MAX_CONCURRENT_REQUESTS = "maxConcurrentRequests"
+CONF_WRITE_COALESCE_WINDOW = "writeCoalesceWindow"
+CONF_MIN_SCAN_INTERVAL = "minScanInterval"
+CONF_MAX_SCAN_INTERVAL = "maxScanInterval"
+CONF_DIAGNOSTIC_SENSORS = "diagnosticSensors"
+CONF_MAX_REQUESTS_PER_MINUTE = "maxRequestsPerMinute"
+CONF_HISTORY_SIZE = "historySize"
+CONF_HISTORY_RETENTION = "historyRetention"
 DATA = "data"
 UPDATE_TRACK = "update_track"
 
@@ -22,6 +30,7 @@ VERSION = "0.0.1"
 DOMAIN = "rika_firenet"
 
 UNIQUE_ID = "unique_id"
+DATA_CONNECTION_MANAGER = f"{DOMAIN}_connection_manager"
 
 DEFAULT_NAME = "Rika"
 NAME = "Rika Firenet"
@@ -40,16 +49,61 @@ If you have any issues with this you need to open an issue here:
 -------------------------------------------------------------------
 """
 
+# Storage
+STORAGE_KEY = DOMAIN
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
+STATE_SAVE_INTERVAL = 15  # minutes
+
 # HTTP Configuration
 HTTP_TIMEOUT = 10  # seconds
-HTTP_RETRY_DELAY = 2  # seconds
-HTTP_RETRY_MAX_ATTEMPTS = 10
+CONTROL_CONFIRMATION_TIMEOUT = 20  # seconds
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_WRITE_COALESCE_WINDOW = 0.3  # seconds
+DEFAULT_MIN_SCAN_INTERVAL = 5  # seconds
+DEFAULT_MAX_SCAN_INTERVAL = 120  # seconds
+COMMAND_BOOST_DURATION = 60  # seconds
+DEFAULT_MAX_REQUESTS_PER_MINUTE = 120
+REQUEST_BUDGET_BURST = 20
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 60  # seconds
+
+# Window of the pellet consumption rate
+CONSUMPTION_RATE_WINDOW = 60  # minutes
+
+# Sample history per stove
+DEFAULT_HISTORY_SIZE = 1440  # samples
+DEFAULT_HISTORY_RETENTION = 6  # hours
+
+# Request budget shared by all accounts
+GLOBAL_MAX_CONCURRENT_REQUESTS = 8
+GLOBAL_REQUEST_RATE = 5  # requests per second
+GLOBAL_REQUEST_BURST = 10
+
+# Attributes
+ATTR_CONTROL_CONFIRMATION = "control_confirmation"
+ATTR_COALESCED_WRITES = "coalesced_writes"
+ATTR_TARGET_TEMPERATURE = "target_temperature"
+ATTR_RESTORED = "restored"
+
+# Services
+SERVICE_SET_CONTROLS = "set_controls"
+
+# Control confirmation states
+CONTROL_CONFIRMATION_PENDING = "pending"
+CONTROL_CONFIRMATION_CONFIRMED = "confirmed"
+CONTROL_CONFIRMATION_FAILED = "failed"
 
 # Stove States
 STOVE_STATE_OFF = 1
 STOVE_STATE_RUNNING = 4
 STOVE_STATE_HEATING = 5
 
+# Stove statuses polled at the minimum interval, the stove changes quickly
+STOVE_STATUSES_FAST_POLL = ("ignition_on", "starting_up")
+# Stove statuses polled at the maximum interval, nothing happens until asked
+STOVE_STATUSES_SLOW_POLL = ("stove_off", "standby")
+
 # API URLs
 API_BASE_URL = "https://www.rika-firenet.com"
 API_LOGIN_URL = f"{API_BASE_URL}/web/login"
@@ -0,0 +1,123 @@
+"""Pellet consumption rate, daily usage and hopper forecast of a stove."""
+
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+
+class PelletConsumption:
+    """Derive consumption figures from the cumulative feed rate total.
+
+    Every sample updates the figures in constant (amortized) time: the rate
+    keeps the samples of a sliding window in a deque, the daily usage and
+    the hopper level only remember the total they count from.
+    """
+
+    def __init__(self, window: timedelta, stored=None):
+        self._window = window.total_seconds()
+        self._samples = deque()
+        stored = stored or {}
+        self._day = stored.get("day")
+        self._day_start_total = stored.get("day_start_total")
+        self._hopper_fill = stored.get("hopper_fill")
+        self._hopper_fill_total = stored.get("hopper_fill_total")
+        self._total = None
+        self._rate = None
+        self._hopper_empty = None
+
+    def as_dict(self):
+        """Return what has to survive a restart."""
+        return {
+            "day": self._day,
+            "day_start_total": self._day_start_total,
+            "hopper_fill": self._hopper_fill,
+            "hopper_fill_total": self._hopper_fill_total,
+        }
+
+    def update(self, total, now=None):
+        """Add a sample, return whether the persisted state changed."""
+        if now is None:
+            now = dt_util.utcnow()
+        timestamp = now.timestamp()
+        samples = self._samples
+        changed = False
+
+        if samples and total < samples[-1][1]:
+            # The counter was reset, e.g. by a service of the stove. Move the
+            # totals counted from along, what was consumed stays consumed.
+            offset = total - samples[-1][1]
+            samples.clear()
+            if self._day_start_total is not None:
+                self._day_start_total += offset
+            if self._hopper_fill_total is not None:
+                self._hopper_fill_total += offset
+            changed = True
+        samples.append((timestamp, total))
+
+        # Keep the newest sample at or before the window start, the rate
+        # covers the complete window once there is enough history.
+        while len(samples) > 2 and samples[1][0] <= timestamp - self._window:
+            samples.popleft()
+
+        first_timestamp, first_total = samples[0]
+        if first_timestamp <= timestamp - self._window:
+            self._rate = (total - first_total) / (timestamp - first_timestamp) * 3600
+        else:
+            # The counter counts whole kg, a shorter span turns a single
+            # step into an absurd rate.
+            self._rate = None
+        self._total = total
+
+        if self._hopper_fill is not None and self._hopper_fill_total is None:
+            self._hopper_fill_total = total
+            changed = True
+        self._update_hopper_empty(now)
+
+        day = dt_util.as_local(now).date().isoformat()
+        if day != self._day or self._day_start_total is None:
+            self._day = day
+            self._day_start_total = total
+            changed = True
+        return changed
+
+    def _update_hopper_empty(self, now):
+        remaining = self.get_hopper_remaining()
+        if remaining is None or not self._rate or self._rate <= 0:
+            self._hopper_empty = None
+        else:
+            empty = now + timedelta(hours=remaining / self._rate)
+            # Minutes are precise enough, and spare a state write every poll.
+            self._hopper_empty = empty.replace(second=0, microsecond=0)
+
+    def get_rate(self):
+        """Return the consumption of the sliding window in kg/h.
+
+        None until the samples cover the complete window.
+        """
+        return self._rate
+
+    def get_daily_usage(self):
+        if self._total is None or self._day_start_total is None:
+            return None
+        return self._total - self._day_start_total
+
+    def set_hopper_fill(self, fill):
+        """Remember the hopper was filled with ``fill`` kg just now."""
+        self._hopper_fill = fill
+        self._hopper_fill_total = self._total
+        self._update_hopper_empty(dt_util.utcnow())
+
+    def get_hopper_fill(self):
+        return self._hopper_fill
+
+    def get_hopper_remaining(self):
+        if self._hopper_fill is None:
+            return None
+        if self._total is None or self._hopper_fill_total is None:
+            return self._hopper_fill
+        return max(0.0, self._hopper_fill - (self._total - self._hopper_fill_total))
+
+    def get_hopper_empty(self):
+        """Return when the hopper runs empty at the current rate."""
+        return self._hopper_empty
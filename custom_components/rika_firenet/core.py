@@ -1,213 +1,496 @@
+import asyncio
 import logging
 import time
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-import requests
-from bs4 import BeautifulSoup
 from homeassistant.components.climate.const import HVACMode, PRESET_AWAY, PRESET_HOME
-
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .client import RikaFirenetClient
+from .connection import async_get_connection_manager
 from .const import (
+    ATTR_CONTROL_CONFIRMATION,
+    COMMAND_BOOST_DURATION,
+    CONSUMPTION_RATE_WINDOW,
+    CONTROL_CONFIRMATION_CONFIRMED,
+    CONTROL_CONFIRMATION_FAILED,
+    CONTROL_CONFIRMATION_PENDING,
+    CONTROL_CONFIRMATION_TIMEOUT,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REQUESTS_PER_MINUTE,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_WRITE_COALESCE_WINDOW,
     DOMAIN,
-    HTTP_TIMEOUT,
-    HTTP_RETRY_DELAY,
-    HTTP_RETRY_MAX_ATTEMPTS,
+    STATE_SAVE_INTERVAL,
+    STORAGE_SAVE_DELAY,
     STOVE_STATE_RUNNING,
     STOVE_STATE_HEATING,
-    API_LOGIN_URL,
-    API_STOVES_URL,
-    API_CLIENT_URL,
+    STOVE_STATUSES_FAST_POLL,
+    STOVE_STATUSES_SLOW_POLL,
 )
 from .exceptions import (
     RikaAuthenticationError,
     RikaApiError,
     RikaConnectionError,
+    RikaFirenetError,
     RikaTimeoutError,
+    RikaValidationError,
 )
+from .consumption import PelletConsumption
+from .history import SampleHistory
+from .metrics import RikaFirenetMetrics
+from .snapshot import StoveSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=10)
+# Pseudo field changed along with the availability of a stove
+FIELD_AVAILABLE = "available"
+# Pseudo field changed when the restored state of a stove is replaced
+FIELD_RESTORED = "restored"
+# Pseudo fields of the values derived from the pellet consumption
+FIELD_CONSUMPTION = "consumption"
+FIELD_HOPPER_FILL = "hopper_fill"
 SCAN_INTERVAL = timedelta(seconds=15)
 
 
 class RikaFirenetCoordinator(DataUpdateCoordinator):
     def __init__(
-        self, hass, username, password, default_temperature, config_flow=False
+        self,
+        hass,
+        username,
+        password,
+        default_temperature,
+        max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS,
+        write_coalesce_window=DEFAULT_WRITE_COALESCE_WINDOW,
+        min_scan_interval=DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval=DEFAULT_MAX_SCAN_INTERVAL,
+        max_requests_per_minute=DEFAULT_MAX_REQUESTS_PER_MINUTE,
+        history_size=DEFAULT_HISTORY_SIZE,
+        history_retention=DEFAULT_HISTORY_RETENTION,
+        store=None,
     ):
         self.hass = hass
         self._username = username
         self._password = password
         self._default_temperature = default_temperature
+        self._max_concurrent_requests = max_concurrent_requests
+        self._write_coalesce_window = write_coalesce_window
+        self._min_scan_interval = timedelta(seconds=min_scan_interval)
+        self._max_scan_interval = timedelta(
+            seconds=max(min_scan_interval, max_scan_interval)
+        )
+        self._max_requests_per_minute = max_requests_per_minute
+        self._history_size = history_size
+        self._history_retention = timedelta(hours=history_retention)
+        self._failed_updates = 0
+        self._boost_until = 0
+        self._cancel_refresh_after_command = None
+        self._store = store
+        self._stored = {}
+        self._states_changed = False
+        self._unsub_state_save = None
+        self._unsub_state_save_at_stop = None
         self._client = None
         self._stoves = None
+        self._restored_stoves = False
+        self._stove_listeners = []
+        self._suppressed_writes = 0
+        self._notified_update_success = False
+        self._metrics_listeners = []
+        self._metrics = RikaFirenetMetrics()
         self.platforms = []
 
-        if not config_flow:
-            super().__init__(
-                hass,
-                _LOGGER,
-                name=DOMAIN,
-                update_method=self.async_update_data,
-                update_interval=SCAN_INTERVAL,
-            )
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_method=self.async_update_data,
+            update_interval=SCAN_INTERVAL,
+        )
 
     async def async_update_data(self):
+        start = time.monotonic()
         try:
-            await self.hass.async_add_executor_job(self.update)
+            await self.async_update()
         except (
             RikaAuthenticationError,
             RikaApiError,
             RikaConnectionError,
             RikaTimeoutError,
+            RikaValidationError,
         ) as exception:
+            self._metrics.record_cycle(
+                time.monotonic() - start, type(exception).__name__
+            )
+            self._failed_updates += 1
+            self.update_interval = self._get_next_update_interval()
             raise UpdateFailed(
                 f"Error updating Rika Firenet data: {exception}"
             ) from exception
-        except requests.exceptions.RequestException as exception:
-            raise UpdateFailed(f"Network error: {exception}") from exception
 
-    def setup(self):
+        self._metrics.record_cycle(time.monotonic() - start)
+        self._failed_updates = 0
+        self.update_interval = self._get_next_update_interval()
+
+    def _get_next_update_interval(self):
+        """Pick the next poll interval from the state of the stoves."""
+        if self._failed_updates:
+            interval = SCAN_INTERVAL * 2 ** min(self._failed_updates, 8)
+        elif time.monotonic() < self._boost_until:
+            interval = self._min_scan_interval
+        else:
+            interval = self._max_scan_interval
+            for stove in self._stoves:
+                if not stove.is_available():
+                    interval = min(interval, SCAN_INTERVAL)
+                    continue
+
+                status = stove.get_status_text()
+                if status in STOVE_STATUSES_FAST_POLL:
+                    interval = self._min_scan_interval
+                elif status not in STOVE_STATUSES_SLOW_POLL:
+                    interval = min(interval, SCAN_INTERVAL)
+
+        return min(max(interval, self._min_scan_interval), self._max_scan_interval)
+
+    @callback
+    def async_note_command(self):
+        """Poll quickly for a while so a command is confirmed soon."""
+        self._boost_until = time.monotonic() + COMMAND_BOOST_DURATION
+        self.update_interval = self._min_scan_interval
+        # One refresh covers a burst of commands.
+        if self._cancel_refresh_after_command is not None:
+            self._cancel_refresh_after_command()
+        self._cancel_refresh_after_command = async_call_later(
+            self.hass, self._min_scan_interval, self._async_refresh_after_command
+        )
+
+    async def _async_refresh_after_command(self, _now):
+        self._cancel_refresh_after_command = None
+        await self.async_request_refresh()
+
+    async def async_setup(self):
         _LOGGER.info("setup()")
-        self._client = requests.session()
-        self._stoves = self.setup_stoves()
+        if self._store is not None:
+            self._stored = await self._store.async_load() or {}
+            self._unsub_state_save = async_track_time_interval(
+                self.hass,
+                self._async_save_states,
+                timedelta(minutes=STATE_SAVE_INTERVAL),
+            )
+            self._unsub_state_save_at_stop = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_save_states_at_stop
+            )
+
+        connection_manager = async_get_connection_manager(self.hass)
+        self._client = RikaFirenetClient(
+            connection_manager.async_create_session(),
+            self._username,
+            self._password,
+            self._async_session_updated,
+            connection_manager,
+            self._metrics,
+            self._max_requests_per_minute,
+        )
+        self._client.restore_session(self._stored.get("session"))
+
+        cached_stoves = self._stored.get("stoves")
+        if cached_stoves is not None:
+            _LOGGER.debug("Using %d cached stoves", len(cached_stoves))
+            self._stoves = [
+                RikaFirenetStove(self, stove_id, name)
+                for stove_id, name in cached_stoves
+            ]
+            self._restored_stoves = True
+        else:
+            self._stoves = await self.async_setup_stoves()
+            self._async_cache_stoves()
+
+    def has_restored_stoves(self):
+        """Return whether the stoves were set up from the persisted list."""
+        return self._restored_stoves
+
+    async def async_refresh_restored(self):
+        """Replace the restored state with the live one, look for new stoves."""
+        await self.async_refresh()
+        await self.async_discover_stoves()
+
+    @callback
+    def _async_session_updated(self, session):
+        self._stored["session"] = session
+        self._async_schedule_save()
+
+    async def async_shutdown(self):
+        await super().async_shutdown()
+        if self._cancel_refresh_after_command is not None:
+            self._cancel_refresh_after_command()
+            self._cancel_refresh_after_command = None
+        if self._unsub_state_save is not None:
+            self._unsub_state_save()
+            self._unsub_state_save = None
+        if self._unsub_state_save_at_stop is not None:
+            self._unsub_state_save_at_stop()
+            self._unsub_state_save_at_stop = None
+        # Write pending changes now, a reload creates a new store instance.
+        if self._store is not None:
+            await self._store.async_save(self._stored)
+
+    @callback
+    def _async_schedule_save(self):
+        if self._store is not None:
+            self._states_changed = False
+            self._store.async_delay_save(lambda: self._stored, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _async_save_states(self, _now):
+        """Persist the stove states changed since the last save."""
+        if self._states_changed:
+            self._async_schedule_save()
+
+    async def _async_save_states_at_stop(self, _event):
+        # Home Assistant does not unload the entries when it stops.
+        self._unsub_state_save_at_stop = None
+        if self._states_changed:
+            self._states_changed = False
+            await self._store.async_save(self._stored)
 
     def get_stoves(self):
         return self._stoves
 
-    def get_default_temperature(self):
-        return self._default_temperature
+    @callback
+    def async_add_metrics_listener(self, listener):
+        """Call listener after every refresh, whether stoves changed or not."""
+        self._metrics_listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            self._metrics_listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self):
+        for listener in list(self._metrics_listeners):
+            listener()
 
-    def connect(self):
-        if self.is_authenticated():
+        if (
+            self.last_update_success
+            and self._notified_update_success
+            and not any(stove.get_changed_fields() for stove in self._stoves or ())
+        ):
+            # Nothing an entity shows changed since they were last notified.
+            self._metrics.record_skipped_notification()
             return
 
-        data = {"email": self._username, "password": self._password}
+        self._notified_update_success = self.last_update_success
+        super().async_update_listeners()
+        # Every entity has seen the changes now.
+        for stove in self._stoves or ():
+            stove.clear_changed_fields()
+
+    @callback
+    def async_note_suppressed_write(self):
+        self._suppressed_writes += 1
+
+    def get_suppressed_writes(self):
+        return self._suppressed_writes
+
+    def get_metrics(self):
+        return self._metrics
+
+    def get_circuit_breaker(self):
+        return self._client.get_circuit_breaker()
+
+    @callback
+    def async_set_options(
+        self,
+        default_temperature,
+        max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS,
+        write_coalesce_window=DEFAULT_WRITE_COALESCE_WINDOW,
+        min_scan_interval=DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval=DEFAULT_MAX_SCAN_INTERVAL,
+        max_requests_per_minute=DEFAULT_MAX_REQUESTS_PER_MINUTE,
+        history_size=DEFAULT_HISTORY_SIZE,
+        history_retention=DEFAULT_HISTORY_RETENTION,
+    ):
+        """Apply changed options to the running coordinator and stoves."""
+        self._default_temperature = default_temperature
+        self._max_concurrent_requests = max_concurrent_requests
+        self._write_coalesce_window = write_coalesce_window
+        self._min_scan_interval = timedelta(seconds=min_scan_interval)
+        self._max_scan_interval = timedelta(
+            seconds=max(min_scan_interval, max_scan_interval)
+        )
 
-        try:
-            post_response = self._client.post(API_LOGIN_URL, data, timeout=HTTP_TIMEOUT)
-            post_response.raise_for_status()
-        except requests.exceptions.Timeout as exception:
-            raise RikaTimeoutError("Timeout connecting to Rika Firenet") from exception
-        except requests.exceptions.RequestException as exception:
-            raise RikaConnectionError(
-                f"Failed to connect to Rika Firenet: {exception}"
-            ) from exception
+        if max_requests_per_minute != self._max_requests_per_minute:
+            self._max_requests_per_minute = max_requests_per_minute
+            self._client.set_max_requests_per_minute(max_requests_per_minute)
 
-        if post_response.status_code != 200 or "/logout" not in post_response.text:
-            raise RikaAuthenticationError(
-                "Authentication failed - invalid credentials or server error"
-            )
+        history_retention = timedelta(hours=history_retention)
+        if (history_size, history_retention) != (
+            self._history_size,
+            self._history_retention,
+        ):
+            self._history_size = history_size
+            self._history_retention = history_retention
+            for stove in self._stoves:
+                stove.get_history().resize(
+                    history_size, history_retention.total_seconds()
+                )
 
-        _LOGGER.debug("Connected to Rika Firenet")
+        # Don't wait for a poll scheduled with the old intervals.
+        self.update_interval = self._get_next_update_interval()
+        if self._listeners:
+            self._schedule_refresh()
 
-    def is_authenticated(self):
-        if "connect.sid" not in self._client.cookies:
-            return False
+    def get_default_temperature(self):
+        return self._default_temperature
 
-        expires_in = list(self._client.cookies)[0].expires
-        epoch_now = int(datetime.now().timestamp())
+    def get_write_coalesce_window(self):
+        return self._write_coalesce_window
 
-        if expires_in <= epoch_now:
-            return False
+    def get_stored_state(self, stove_id):
+        return self._stored.get("states", {}).get(stove_id)
 
-        return True
+    @callback
+    def async_store_state(self, stove_id, state):
+        # Stoves report a new state every poll, like RestoreEntity the states
+        # are written every STATE_SAVE_INTERVAL and at shutdown only.
+        self._stored.setdefault("states", {})[stove_id] = state
+        self._states_changed = True
+
+    def get_stored_consumption(self, stove_id):
+        return self._stored.get("consumption", {}).get(stove_id)
 
-    def get_stove_state(self, stove_id):
-        self.connect()
-        url = f"{API_CLIENT_URL}/{stove_id}/status?nocache={int(time.time())}"
+    @callback
+    def async_store_consumption(self, stove_id, consumption):
+        self._stored.setdefault("consumption", {})[stove_id] = consumption
+        self._async_schedule_save()
+
+    def create_history(self):
+        return SampleHistory(
+            self._history_size, self._history_retention.total_seconds()
+        )
 
+    async def async_get_stove_state(self, stove_id):
+        return await self._client.async_get_stove_state(stove_id)
+
+    async def async_get_stove_state_if_changed(self, stove_id, digest):
+        return await self._client.async_get_stove_state_if_changed(stove_id, digest)
+
+    @callback
+    def _async_cache_stoves(self):
+        self._stored["stoves"] = [
+            [stove.get_id(), stove.get_name()] for stove in self._stoves
+        ]
+        stove_ids = {stove.get_id() for stove in self._stoves}
+        for key in ("states", "consumption"):
+            if key in self._stored:
+                self._stored[key] = {
+                    stove_id: value
+                    for stove_id, value in self._stored[key].items()
+                    if stove_id in stove_ids
+                }
+        self._async_schedule_save()
+
+    @callback
+    def async_add_stove_listener(self, listener):
+        """Call listener with every stove discovered after setup."""
+        self._stove_listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            self._stove_listeners.remove(listener)
+
+        return remove_listener
+
+    async def async_discover_stoves(self):
+        """Reconcile the cached stoves with the ones linked to the account."""
         try:
-            response = self._client.get(url, timeout=HTTP_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.Timeout as exception:
-            raise RikaTimeoutError(
-                f"Timeout getting stove state for {stove_id}"
-            ) from exception
-        except requests.exceptions.RequestException as exception:
-            raise RikaApiError(f"Failed to get stove state: {exception}") from exception
-        except ValueError as exception:
-            raise RikaApiError(f"Invalid JSON response: {exception}") from exception
+            discovered = await self._client.async_get_stoves()
+        except RikaFirenetError as exception:
+            _LOGGER.warning("Stove discovery failed: %s", exception)
+            return
+        if discovered is None:
+            # Not a list without stoves, keep the known ones.
+            return
 
-        _LOGGER.debug("get_stove_state() for %s: %s", stove_id, data)
-        return data
+        discovered_ids = {stove_id for stove_id, _ in discovered}
+        known_ids = {stove.get_id() for stove in self._stoves}
 
-    def setup_stoves(self):
-        self.connect()
-        stoves = []
+        for stove in [s for s in self._stoves if s.get_id() not in discovered_ids]:
+            _LOGGER.info("Removing stove: %s", stove)
+            self._stoves.remove(stove)
+            stove.async_removed()
 
-        try:
-            response = self._client.get(API_STOVES_URL, timeout=HTTP_TIMEOUT)
-            response.raise_for_status()
-        except requests.exceptions.Timeout as exception:
-            raise RikaTimeoutError("Timeout getting stove list") from exception
-        except requests.exceptions.RequestException as exception:
-            raise RikaApiError(f"Failed to get stove list: {exception}") from exception
-
-        soup = BeautifulSoup(response.content, "html.parser")
-        stove_list = soup.find("ul", {"id": "stoveList"})
-
-        if stove_list is None:
-            _LOGGER.warning("No stoves found in account")
-            return stoves
-
-        for stove_element in stove_list.findAll("li"):
-            stove_link = stove_element.find("a", href=True)
-            if not stove_link:
+        for stove_id, name in discovered:
+            if stove_id in known_ids:
                 continue
-            stove_id = stove_link.attrs["href"].rsplit("/", 1)[-1]
-            stove = RikaFirenetStove(self, stove_id, stove_link.text)
+
+            stove = RikaFirenetStove(self, stove_id, name)
             _LOGGER.info("Found stove: %s", stove)
-            stoves.append(stove)
+            try:
+                await stove.async_sync_state()
+            except RikaFirenetError as exception:
+                _LOGGER.warning("Failed to update %s: %s", stove, exception)
+                continue
 
-        return stoves
+            self._stoves.append(stove)
+            for listener in list(self._stove_listeners):
+                listener(stove)
 
-    def update(self):
-        _LOGGER.debug("Updating all stoves")
-        for stove in self._stoves:
-            stove.sync_state()
+        self._async_cache_stoves()
 
-    def set_stove_controls(self, stove_id, data):
-        _LOGGER.debug("set_stove_control() id: %s data: %s", stove_id, data)
+    async def async_setup_stoves(self):
+        stoves = []
 
-        url = f"{API_CLIENT_URL}/{stove_id}/controls"
+        for stove_id, name in await self._client.async_get_stoves() or ():
+            stove = RikaFirenetStove(self, stove_id, name)
+            _LOGGER.info("Found stove: %s", stove)
+            stoves.append(stove)
 
-        try:
-            response = self._client.post(url, data, timeout=HTTP_TIMEOUT)
-            response.raise_for_status()
-        except requests.exceptions.Timeout as exception:
-            raise RikaTimeoutError(
-                f"Timeout setting stove controls for {stove_id}"
-            ) from exception
-        except requests.exceptions.RequestException as exception:
-            raise RikaApiError(
-                f"Failed to set stove controls: {exception}"
-            ) from exception
+        return stoves
 
-        for counter in range(HTTP_RETRY_MAX_ATTEMPTS):
-            if "OK" in response.text:
-                _LOGGER.debug("Stove controls updated successfully")
-                return True
+    async def async_update(self):
+        _LOGGER.debug("Updating all stoves")
+        semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+        async def sync_stove(stove):
+            async with semaphore:
+                # The status would predate the write, the refresh after the
+                # command polls the stove again.
+                if stove.has_write_in_flight():
+                    _LOGGER.debug("Skipping poll of %s, write in flight", stove)
+                    self._metrics.record_skipped_poll()
+                    return
+                await stove.async_sync_state()
+
+        # Discovery may add or remove stoves while this refresh runs.
+        stoves = list(self._stoves)
+        results = await asyncio.gather(
+            *(sync_stove(stove) for stove in stoves), return_exceptions=True
+        )
 
-            _LOGGER.debug(
-                "Waiting for control update confirmation (%d/%d)",
-                counter + 1,
-                HTTP_RETRY_MAX_ATTEMPTS,
-            )
-            time.sleep(HTTP_RETRY_DELAY)
+        errors = []
+        for stove, result in zip(stoves, results):
+            if isinstance(result, RikaFirenetError):
+                _LOGGER.warning("Failed to update %s: %s", stove, result)
+                errors.append(result)
+            elif isinstance(result, BaseException):
+                raise result
 
-            try:
-                response = self._client.get(
-                    url.replace("/controls", "/status"), timeout=HTTP_TIMEOUT
-                )
-            except requests.exceptions.RequestException:
-                pass
+        # A single unreachable stove only makes its own entities unavailable.
+        if errors and len(errors) == len(stoves):
+            raise errors[0]
 
-        _LOGGER.warning(
-            "Stove control update not confirmed after %d attempts",
-            HTTP_RETRY_MAX_ATTEMPTS,
-        )
-        return False
+    async def async_set_stove_controls(self, stove_id, data):
+        return await self._client.async_set_stove_controls(stove_id, data)
 
 
 class RikaFirenetStove:
@@ -216,7 +499,33 @@ class RikaFirenetStove:
         self._id = id
         self._name = name
         self._previous_temperature = None
-        self._state = None
+        self._snapshot = None
+        self._status_digest = None
+        self._history = coordinator.create_history()
+        self._consumption = PelletConsumption(
+            timedelta(minutes=CONSUMPTION_RATE_WINDOW),
+            coordinator.get_stored_consumption(id),
+        )
+        self._view = None
+        self._changed_fields = set()
+        self._available = False
+        self._restored = False
+        self._control_confirmation = None
+        self._expected_controls = {}
+        self._cancel_confirmation_timeout = None
+        self._confirmation_started = None
+        self._confirmation_polls = 0
+        self._pending_controls = {}
+        self._pending_writes = 0
+        self._coalesced_writes = 0
+        self._flush_future = None
+        # Batches of changes taken from the buffer, queued for their POST
+        self._queued_controls = []
+        self._command_lock = asyncio.Lock()
+        self._overlay = {}
+        self._removal_listeners = []
+        self._removed = False
+        self._restore_state(coordinator.get_stored_state(id))
 
     def get_id(self):
         return self._id
@@ -230,23 +539,349 @@ class RikaFirenetStove:
     def __str__(self):
         return "Stove(id=" + self._id + ", name=" + self._name + ")"
 
-    def sync_state(self):
+    def is_available(self):
+        return self._available
+
+    def is_restored(self):
+        """Return whether the state is the persisted one of an earlier run."""
+        return self._restored
+
+    def _restore_state(self, state):
+        if state is None:
+            return
+        try:
+            self._snapshot = StoveSnapshot.from_payload(state)
+        except RikaValidationError as exception:
+            _LOGGER.warning("Ignoring restored state of %s: %s", self, exception)
+            return
+
+        _LOGGER.debug("Restored state of %s", self)
+        self._restored = True
+        self._available = True
+        self._update_view()
+
+    @callback
+    def async_add_removal_listener(self, listener):
+        self._removal_listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            self._removal_listeners.remove(listener)
+
+        return remove_listener
+
+    def is_removed(self):
+        return self._removed
+
+    @callback
+    def async_removed(self):
+        """Notify the entities of a stove that was unlinked from the account."""
+        self._removed = True
+        if self._cancel_confirmation_timeout is not None:
+            self._cancel_confirmation_timeout()
+            self._cancel_confirmation_timeout = None
+
+        for listener in list(self._removal_listeners):
+            listener()
+
+    async def async_sync_state(self):
         _LOGGER.debug("Updating stove %s", self._id)
-        self._state = self._coordinator.get_stove_state(self._id)
+        try:
+            payload, digest = await self._coordinator.async_get_stove_state_if_changed(
+                self._id, self._status_digest
+            )
+            if payload is not None:
+                self._snapshot = StoveSnapshot.from_payload(payload)
+                self._status_digest = digest
+                self._coordinator.async_store_state(
+                    self._id, self._snapshot.as_payload()
+                )
+        except RikaFirenetError:
+            self._set_available(False)
+            raise
+        self._set_available(True)
+        if self._restored:
+            self._restored = False
+            self._changed_fields.add(FIELD_RESTORED)
+        # Unchanged payloads are samples too, the values held meanwhile.
+        self._history.append(self._snapshot)
+        self._update_consumption()
+
+        if payload is None:
+            self._coordinator.get_metrics().record_unchanged_payload()
+            # Written values may equal the current ones, check those still.
+            if not self._overlay and not self._expected_controls:
+                return
+
+        self._check_control_confirmation()
+        self._reconcile_overlay()
+        self._update_view()
+
+    def _update_consumption(self):
+        consumption = self._consumption
+        previous = (
+            consumption.get_rate(),
+            consumption.get_daily_usage(),
+            consumption.get_hopper_empty(),
+        )
+        if consumption.update(self._snapshot.stove_consumption):
+            self._coordinator.async_store_consumption(self._id, consumption.as_dict())
+        if previous != (
+            consumption.get_rate(),
+            consumption.get_daily_usage(),
+            consumption.get_hopper_empty(),
+        ):
+            self._changed_fields.add(FIELD_CONSUMPTION)
 
-    def set_stove_temperature(self, temperature):
-        _LOGGER.info("set_stove_temperature(): " + str(temperature))
+    def get_consumption_rate(self):
+        return self._consumption.get_rate()
+
+    def get_daily_consumption(self):
+        return self._consumption.get_daily_usage()
+
+    def get_hopper_fill(self):
+        return self._consumption.get_hopper_fill()
+
+    def get_hopper_remaining(self):
+        return self._consumption.get_hopper_remaining()
+
+    def get_hopper_empty(self):
+        return self._consumption.get_hopper_empty()
+
+    async def async_set_hopper_fill(self, fill):
+        """Remember the hopper was just filled with fill kg of pellets."""
+        _LOGGER.info("set_hopper_fill(): " + str(fill))
+
+        self._consumption.set_hopper_fill(fill)
+        self._coordinator.async_store_consumption(self._id, self._consumption.as_dict())
+        self._changed_fields.update((FIELD_CONSUMPTION, FIELD_HOPPER_FILL))
+        self._coordinator.async_update_listeners()
+
+    def get_history(self):
+        """Return the SampleHistory of the recently polled values."""
+        return self._history
+
+    def _set_available(self, available):
+        if available != self._available:
+            self._changed_fields.add(FIELD_AVAILABLE)
+        self._available = available
+
+    def get_control_confirmation(self):
+        return self._control_confirmation
+
+    def get_changed_fields(self):
+        """Return the fields changed since entities were last notified."""
+        return self._changed_fields
+
+    def clear_changed_fields(self):
+        self._changed_fields = set()
+
+    def get_coalesced_writes(self):
+        return self._coalesced_writes
+
+    def has_write_in_flight(self):
+        """Return whether a /controls POST of the stove is queued or sent."""
+        return self._command_lock.locked()
+
+    async def _async_set_controls(self, changes):
+        """Buffer control changes and send them in one /controls POST.
+
+        Changes made within the write coalesce window are merged, the last
+        write of a field wins. Every caller waits for the shared POST. The
+        POSTs of a stove are sent one at a time, in the order of the writes.
+        """
+        self._pending_controls.update(changes)
+        self._pending_writes += 1
+
+        # Show the written values right away, the next polls reconcile them.
+        self._overlay.update(changes)
+        self._update_view()
+        self._coordinator.async_update_listeners()
+
+        if self._flush_future is None:
+            hass = self._coordinator.hass
+            self._flush_future = hass.loop.create_future()
+            async_call_later(
+                hass,
+                self._coordinator.get_write_coalesce_window(),
+                self._async_flush_controls,
+            )
+
+        await asyncio.shield(self._flush_future)
+
+    async def _async_flush_controls(self, _now):
+        future = self._flush_future
+        changes = self._pending_controls
+        writes = self._pending_writes
+        self._flush_future = None
+        self._pending_controls = {}
+        self._pending_writes = 0
+
+        if writes > 1:
+            self._coalesced_writes += writes - 1
+            self._changed_fields.add(ATTR_CONTROL_CONFIRMATION)
+            _LOGGER.debug("Coalesced %d writes for %s: %s", writes, self._id, changes)
+
+        self._queued_controls.append(changes)
+        try:
+            await self._command_lock.acquire()
+        finally:
+            # Sent changes are tracked as expected controls instead.
+            self._queued_controls.remove(changes)
+        try:
+            await self._async_send_controls(changes, future)
+        finally:
+            self._command_lock.release()
+
+    async def _async_send_controls(self, changes, future):
+        try:
+            # Never send restored controls back, they may be outdated.
+            if self._restored:
+                await self.async_sync_state()
+        except Exception as exception:  # pylint: disable=broad-except
+            for key in changes:
+                if not self._is_writing(key):
+                    self._overlay.pop(key, None)
+            self._update_view()
+            self._coordinator.async_update_listeners()
+            future.set_exception(exception)
+            return
+
+        # The POST replaces the complete set of controls: start from the
+        # polled snapshot, which is never modified, and add the values of
+        # earlier writes that are not confirmed yet.
+        data = {**self.get_control_state(), **self._expected_controls, **changes}
+
+        self._track_control_confirmation(changes)
+        try:
+            await self._coordinator.async_set_stove_controls(self._id, data)
+        except Exception as exception:  # pylint: disable=broad-except
+            self._finish_control_confirmation(CONTROL_CONFIRMATION_FAILED)
+            self._update_view()
+            self._coordinator.async_update_listeners()
+            future.set_exception(exception)
+        else:
+            self._coordinator.async_note_command()
+            future.set_result(None)
+
+    def _is_writing(self, key):
+        """Return whether a write of the control is buffered or queued."""
+        return key in self._pending_controls or any(
+            key in changes for changes in self._queued_controls
+        )
+
+    def _track_control_confirmation(self, changes):
+        """Wait for the written values to show up in the next /status payloads."""
+        self._expected_controls.update(changes)
+        if self._control_confirmation != CONTROL_CONFIRMATION_PENDING:
+            self._confirmation_started = time.monotonic()
+            self._confirmation_polls = 0
+        self._control_confirmation = CONTROL_CONFIRMATION_PENDING
+        self._changed_fields.add(ATTR_CONTROL_CONFIRMATION)
+
+        if self._cancel_confirmation_timeout is not None:
+            self._cancel_confirmation_timeout()
+        self._cancel_confirmation_timeout = async_call_later(
+            self._coordinator.hass,
+            CONTROL_CONFIRMATION_TIMEOUT,
+            self._async_control_confirmation_timeout,
+        )
 
-        data = self.get_control_state()
-        data["targetTemperature"] = str(temperature)
+    def _check_control_confirmation(self):
+        if self._control_confirmation != CONTROL_CONFIRMATION_PENDING:
+            return
+
+        self._confirmation_polls += 1
+        controls = self._snapshot.controls
+        if not all(
+            _control_matches(controls.get(key), value)
+            for key, value in self._expected_controls.items()
+        ):
+            return
+
+        _LOGGER.debug("Stove controls confirmed for %s", self._id)
+        self._finish_control_confirmation(CONTROL_CONFIRMATION_CONFIRMED)
+
+    @callback
+    def _async_control_confirmation_timeout(self, _now):
+        self._cancel_confirmation_timeout = None
+        if self._control_confirmation != CONTROL_CONFIRMATION_PENDING:
+            return
+
+        _LOGGER.warning(
+            "Stove control update not confirmed for %s after %d seconds: %s",
+            self._id,
+            CONTROL_CONFIRMATION_TIMEOUT,
+            self._expected_controls,
+        )
+        self._finish_control_confirmation(CONTROL_CONFIRMATION_FAILED)
+        self._update_view()
+        self._coordinator.async_update_listeners()
+
+    def _finish_control_confirmation(self, result):
+        if self._cancel_confirmation_timeout is not None:
+            self._cancel_confirmation_timeout()
+            self._cancel_confirmation_timeout = None
+
+        if result == CONTROL_CONFIRMATION_FAILED:
+            for key in self._expected_controls:
+                if not self._is_writing(key):
+                    self._overlay.pop(key, None)
+
+        self._expected_controls = {}
+        self._control_confirmation = result
+        self._changed_fields.add(ATTR_CONTROL_CONFIRMATION)
+        self._coordinator.get_metrics().record_confirmation(
+            result,
+            time.monotonic() - self._confirmation_started,
+            self._confirmation_polls,
+        )
+
+    def _reconcile_overlay(self):
+        """Drop optimistic values once polled, roll back the ones that failed."""
+        controls = self._snapshot.controls
+
+        for key, value in list(self._overlay.items()):
+            if _control_matches(controls.get(key), value):
+                del self._overlay[key]
+            elif key not in self._expected_controls and not self._is_writing(key):
+                _LOGGER.warning(
+                    "Stove %s reports %s=%s instead of %s, rolling back",
+                    self._id,
+                    key,
+                    controls.get(key),
+                    value,
+                )
+                del self._overlay[key]
+
+    def _update_view(self):
+        """Apply the optimistic overlay on top of the polled snapshot."""
+        if self._overlay and self._snapshot is not None:
+            view = self._snapshot.with_controls(self._overlay)
+        else:
+            view = self._snapshot
+
+        if view is not None:
+            self._changed_fields.update(view.diff(self._view))
+        self._view = view
+
+    async def async_set_controls(self, controls):
+        """Write several controls at once, in one POST and one confirmation."""
+        _LOGGER.info("set_controls(): " + str(controls))
+
+        await self._async_set_controls(controls)
+        # Services write no entity state of their own, show the confirmation.
+        self._coordinator.async_update_listeners()
+
+    async def async_set_stove_temperature(self, temperature):
+        _LOGGER.info("set_stove_temperature(): " + str(temperature))
 
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"targetTemperature": str(temperature)})
 
     def get_control_state(self):
-        return self._state["controls"]
+        return self._snapshot.controls
 
-    def set_presence(self, presence=PRESET_HOME):
+    async def async_set_presence(self, presence=PRESET_HOME):
         room_thermostat = self.get_room_thermostat()
         _LOGGER.info(
             "set_presence(): "
@@ -257,143 +892,118 @@ class RikaFirenetStove:
 
         if presence == PRESET_AWAY:
             self._previous_temperature = room_thermostat
-            self.set_stove_temperature(self.get_stove_set_back_temperature())
+            await self.async_set_stove_temperature(
+                self.get_stove_set_back_temperature()
+            )
         elif presence == PRESET_HOME:
             if self._previous_temperature:
-                self.set_stove_temperature(self._previous_temperature)
+                await self.async_set_stove_temperature(self._previous_temperature)
             else:
-                self.set_stove_temperature(self._coordinator.get_default_temperature())
+                await self.async_set_stove_temperature(
+                    self._coordinator.get_default_temperature()
+                )
             self._previous_temperature = None
 
     def get_state(self):
-        return self._state
+        return self._view
 
     def get_stove_consumption(self):
-        return self._state["sensors"]["parameterFeedRateTotal"]
+        return self._view.stove_consumption
 
     def get_stove_runtime(self):
-        return self._state["sensors"]["parameterRuntimePellets"]
+        return self._view.stove_runtime
 
     def get_stove_temperature(self):
-        return float(self._state["sensors"]["inputFlameTemperature"])
+        return self._view.stove_temperature
 
     def get_stove_thermostat(self):
-        return float(self._state["controls"]["targetTemperature"])
+        return self._view.room_thermostat
 
     def get_stove_operation_mode(self):
-        return float(self._state["controls"]["operatingMode"])
+        return self._view.operation_mode
 
-    def set_stove_operation_mode(self, mode):
+    async def async_set_stove_operation_mode(self, mode):
         _LOGGER.info("set_stove_operation_mode(): " + str(mode))
 
-        data = self.get_control_state()
-        data["operatingMode"] = mode
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"operatingMode": mode})
 
     def get_stove_set_back_temperature(self):
-        return float(self._state["controls"]["setBackTemperature"])
+        return self._view.set_back_temperature
 
     def is_heating_times_active_for_comfort(self):
-        return self._state["controls"]["heatingTimesActiveForComfort"]
+        return self._view.heating_times_active_for_comfort
 
     def is_stove_on(self):
-        return bool(self._state["controls"]["onOff"])
+        return self._view.on_off
 
     def is_stove_convection_fan1_on(self):
-        return bool(self._state["controls"]["convectionFan1Active"])
+        return self._view.convection_fan1_active
 
     def is_stove_convection_fan2_on(self):
-        return bool(self._state["controls"]["convectionFan2Active"])
+        return self._view.convection_fan2_active
 
     def get_room_thermostat(self):
-        return float(self._state["controls"]["targetTemperature"])
+        return self._view.room_thermostat
 
     def get_room_temperature(self):
-        return float(self._state["sensors"]["inputRoomTemperature"])
+        return self._view.room_temperature
 
     def get_room_power_request(self):
-        return int(self._state["controls"]["RoomPowerRequest"])
+        return self._view.room_power_request
 
     def get_convection_fan1_level(self):
-        return int(self._state["controls"]["convectionFan1Level"])
+        return self._view.convection_fan1_level
 
     def get_convection_fan1_area(self):
-        return int(self._state["controls"]["convectionFan1Area"])
+        return self._view.convection_fan1_area
 
     def get_convection_fan2_level(self):
-        return int(self._state["controls"]["convectionFan2Level"])
+        return self._view.convection_fan2_level
 
     def get_convection_fan2_area(self):
-        return int(self._state["controls"]["convectionFan2Area"])
+        return self._view.convection_fan2_area
 
-    def set_room_power_request(self, power):
+    async def async_set_room_power_request(self, power):
         _LOGGER.info("set_room_power_request(): " + str(power))
 
-        data = self.get_control_state()
-        data["RoomPowerRequest"] = power
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"RoomPowerRequest": power})
 
     def get_heating_power(self):
-        return int(self._state["controls"]["heatingPower"])
+        return self._view.heating_power
 
-    def set_heating_power(self, power):
+    async def async_set_heating_power(self, power):
         _LOGGER.info("set_heating_power(): " + str(power))
 
-        data = self.get_control_state()
-        data["heatingPower"] = power
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"heatingPower": power})
 
-    def set_convection_fan1_level(self, level):
+    async def async_set_convection_fan1_level(self, level):
         _LOGGER.info("set_convection_fan1_level(): " + str(level))
 
-        data = self.get_control_state()
-        data["convectionFan1Level"] = level
+        await self._async_set_controls({"convectionFan1Level": level})
 
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
-
-    def set_convection_fan1_area(self, area):
+    async def async_set_convection_fan1_area(self, area):
         _LOGGER.info("set_convection_fan1_area(): " + str(area))
 
-        data = self.get_control_state()
-        data["convectionFan1Area"] = area
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"convectionFan1Area": area})
 
-    def set_convection_fan2_level(self, level):
+    async def async_set_convection_fan2_level(self, level):
         _LOGGER.info("set_convection_fan2_level(): " + str(level))
 
-        data = self.get_control_state()
-        data["convectionFan2Level"] = level
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"convectionFan2Level": level})
 
-    def set_convection_fan2_area(self, area):
+    async def async_set_convection_fan2_area(self, area):
         _LOGGER.info("set_convection_fan2_area(): " + str(area))
 
-        data = self.get_control_state()
-        data["convectionFan2Area"] = area
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"convectionFan2Area": area})
 
     def is_stove_burning(self):
-        main_state = self._state["sensors"]["statusMainState"]
-        return main_state in (STOVE_STATE_RUNNING, STOVE_STATE_HEATING)
+        return self._view.main_state in (STOVE_STATE_RUNNING, STOVE_STATE_HEATING)
 
     def get_status_text(self):
-        return self.get_status()[1]
+        return self._view.status.text
 
     def get_status_picture(self):
-        return self.get_status()[0]
+        return self._view.status.picture
 
     def get_hvac_mode(self):
         if not self.is_stove_on():
@@ -407,110 +1017,66 @@ class RikaFirenetStove:
 
         return HVACMode.AUTO
 
-    def set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         if hvac_mode == HVACMode.OFF:
-            self.turn_off()
+            await self.async_turn_off()
         elif hvac_mode == HVACMode.AUTO:
-            self.set_heating_times_active_for_comfort(True)
+            await self.async_set_heating_times_active_for_comfort(True)
         elif hvac_mode == HVACMode.HEAT:
-            self.set_heating_times_active_for_comfort(False)
+            await self.async_set_heating_times_active_for_comfort(False)
 
-    def set_heating_times_active_for_comfort(self, active):
+    async def async_set_heating_times_active_for_comfort(self, active):
         _LOGGER.info("set_heating_times_active_for_comfort(): " + str(active))
 
-        data = self.get_control_state()
-        data["onOff"] = True
-        data["heatingTimesActiveForComfort"] = active
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls(
+            {
+                "onOff": True,
+                "heatingTimesActiveForComfort": active,
+            }
+        )
 
-    def turn_convection_fan1_on(self):
-        self.turn_convection_fan1_on_off(True)
+    async def async_turn_convection_fan1_on(self):
+        await self.async_turn_convection_fan1_on_off(True)
 
-    def turn_convection_fan1_off(self):
-        self.turn_convection_fan1_on_off(False)
+    async def async_turn_convection_fan1_off(self):
+        await self.async_turn_convection_fan1_on_off(False)
 
-    def turn_convection_fan1_on_off(self, on_off=True):
+    async def async_turn_convection_fan1_on_off(self, on_off=True):
         _LOGGER.info("turn_convection_fan1_on_off(): ")
 
-        data = self.get_control_state()
-        data["convectionFan1Active"] = on_off
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"convectionFan1Active": on_off})
 
-    def turn_convection_fan2_on(self):
-        self.turn_convection_fan2_on_off(True)
+    async def async_turn_convection_fan2_on(self):
+        await self.async_turn_convection_fan2_on_off(True)
 
-    def turn_convection_fan2_off(self):
-        self.turn_convection_fan2_on_off(False)
+    async def async_turn_convection_fan2_off(self):
+        await self.async_turn_convection_fan2_on_off(False)
 
-    def turn_convection_fan2_on_off(self, on_off=True):
+    async def async_turn_convection_fan2_on_off(self, on_off=True):
         _LOGGER.info("turn_convection_fan2_on_off(): ")
 
-        data = self.get_control_state()
-        data["convectionFan2Active"] = on_off
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"convectionFan2Active": on_off})
 
-    def turn_on(self):
-        self.turn_on_off(True)
+    async def async_turn_on(self):
+        await self.async_turn_on_off(True)
 
-    def turn_off(self):
-        self.turn_on_off(False)
+    async def async_turn_off(self):
+        await self.async_turn_on_off(False)
 
-    def turn_on_off(self, on_off=True):
+    async def async_turn_on_off(self, on_off=True):
         _LOGGER.info("turn_off(): ")
 
-        data = self.get_control_state()
-        data["onOff"] = on_off
-
-        self._coordinator.set_stove_controls(self._id, data)
-        self.sync_state()
+        await self._async_set_controls({"onOff": on_off})
 
     def get_status(self):
-        main_state = self._state["sensors"]["statusMainState"]
-        sub_state = self._state["sensors"]["statusSubState"]
-        frost_started = self._state["sensors"]["statusFrostStarted"]
-
-        if frost_started:
-            return ["/images/status/Visu_Freeze.svg", "frost_protection"]
-
-        if main_state == 1:
-            if sub_state == 0:
-                return ["/images/status/Visu_Off.svg", "stove_off"]
-            elif sub_state == 1:
-                return ["/images/status/Visu_Standby.svg", "standby"]
-            elif sub_state == 2:
-                return ["/images/status/Visu_Standby.svg", "external_request"]
-            elif sub_state == 3:
-                return ["/images/status/Visu_Standby.svg", "standby"]
-            return ["/images/status/Visu_Off.svg", "sub_state_unknown"]
-        elif main_state == 2:
-            return ["/images/status/Visu_Ignition.svg", "ignition_on"]
-        elif main_state == 3:
-            return ["/images/status/Visu_Ignition.svg", "starting_up"]
-        elif main_state == 4:
-            return ["/images/status/Visu_Control.svg", "running"]
-        elif main_state == 5:
-            if sub_state == 3 or sub_state == 4:
-                return ["/images/status/Visu_Clean.svg", "big_clean"]
-            else:
-                return ["/images/status/Visu_Clean.svg", "clean"]
-        elif main_state == 6:
-            return ["/images/status/Visu_BurnOff.svg", "burn_off"]
-        elif (
-            main_state == 11
-            or main_state == 13
-            or main_state == 14
-            or main_state == 16
-            or main_state == 17
-            or main_state == 50
-        ):
-            return ["/images/status/Visu_SpliLog.svg", "split_log_check"]
-        elif main_state == 20 or main_state == 21:
-            return ["/images/status/Visu_SpliLog.svg", "split_log_mode"]
+        return self._view.status
+
 
-        return ["/images/status/Visu_Off.svg", "unknown"]
+def _control_matches(actual, expected):
+    """Compare a polled control value with the value that was written."""
+    if str(actual) == str(expected):
+        return True
+    try:
+        return float(actual) == float(expected)
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,39 @@
+"""Diagnostics support for Rika Firenet."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PASSWORD, CONF_USERNAME, DOMAIN
+from .core import RikaFirenetCoordinator
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return the request metrics and stove states of a config entry."""
+    coordinator: RikaFirenetCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "last_update_success": coordinator.last_update_success,
+        "suppressed_writes": coordinator.get_suppressed_writes(),
+        "stoves": [
+            {
+                "id": stove.get_id(),
+                "available": stove.is_available(),
+                "restored": stove.is_restored(),
+                "status": stove.get_status_text() if stove.is_available() else None,
+                "control_confirmation": stove.get_control_confirmation(),
+                "coalesced_writes": stove.get_coalesced_writes(),
+                "history": stove.get_history().as_dict(),
+            }
+            for stove in coordinator.get_stoves()
+        ],
+        "circuit_breaker": coordinator.get_circuit_breaker().as_dict(),
+        "metrics": coordinator.get_metrics().as_dict(),
+    }
@@ -1,13 +1,18 @@
 import logging
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, NAME, DEFAULT_NAME, VERSION
+from .const import ATTR_RESTORED, DOMAIN, NAME, DEFAULT_NAME, VERSION
 from .core import RikaFirenetStove, RikaFirenetCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class RikaFirenetEntity(CoordinatorEntity):
+    # Stove fields the state of the entity depends on
+    _fields = frozenset()
+
     def __init__(
         self,
         config_entry,
@@ -19,10 +24,12 @@ class RikaFirenetEntity(CoordinatorEntity):
 
         self._config_entry = config_entry
         self._stove = stove
+        self._written_available = None
+        self._written_restored = None
 
         if suffix is not None:
             self._name = f"{stove.get_name()} {suffix}"
-            self._unique_id = f"{suffix} {stove.get_name()}"
+            self._unique_id = f"{stove.get_id()} {suffix}"
         else:
             self._name = stove.get_name()
             self._unique_id = stove.get_id()
@@ -34,6 +41,52 @@ class RikaFirenetEntity(CoordinatorEntity):
             + self._unique_id
         )
 
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        if self._stove.is_removed():
+            self._async_stove_removed()
+            return
+
+        self.async_on_remove(
+            self._stove.async_add_removal_listener(self._async_stove_removed)
+        )
+
+    @callback
+    def _async_stove_removed(self):
+        _LOGGER.info("Removing entity %s of removed stove", self.entity_id)
+        registry = er.async_get(self.hass)
+        if registry.async_get(self.entity_id) is not None:
+            registry.async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Only write the state when a field of the entity changed."""
+        available = self.available
+        restored = self._stove.is_restored()
+        if (
+            available == self._written_available
+            and restored == self._written_restored
+            and self._fields.isdisjoint(self._stove.get_changed_fields())
+        ):
+            self.coordinator.async_note_suppressed_write()
+            return
+
+        self._written_available = available
+        self._written_restored = restored
+        super()._handle_coordinator_update()
+
+    @property
+    def available(self):
+        return super().available and self._stove.is_available()
+
+    @property
+    def extra_state_attributes(self):
+        if self._stove.is_restored():
+            return {ATTR_RESTORED: True}
+        return None
+
     @property
     def unique_id(self):
         return self._unique_id
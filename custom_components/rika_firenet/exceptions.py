@@ -17,6 +17,10 @@ class RikaConnectionError(RikaFirenetError):
     """Exception raised when connection to Rika servers fails."""
 
 
+class RikaCircuitOpenError(RikaConnectionError):
+    """Exception raised when requests are paused after repeated failures."""
+
+
 class RikaTimeoutError(RikaFirenetError):
     """Exception raised when request times out."""
 
@@ -0,0 +1,161 @@
+"""Bounded in-memory history of the numeric fields of a stove."""
+
+import time
+from array import array
+from typing import NamedTuple
+
+# Snapshot attributes kept in the history
+HISTORY_FIELDS = (
+    "stove_temperature",
+    "room_temperature",
+    "heating_power",
+    "stove_consumption",
+    "stove_runtime",
+)
+
+
+class HistoryAggregate(NamedTuple):
+    count: int
+    first: float
+    last: float
+    minimum: float
+    maximum: float
+    mean: float
+    # Seconds between the first and the last sample
+    duration: float
+
+
+class SampleHistory:
+    """Ring buffer of timestamped samples backed by fixed size arrays.
+
+    Holds at most ``size`` samples, samples older than ``retention`` seconds
+    are dropped as new ones come in. Samples are ordered by time, so windows
+    are found by bisection instead of scanning the buffer.
+    """
+
+    def __init__(self, size, retention):
+        self._size = size
+        self._retention = retention
+        self._times = array("d", bytes(8 * size))
+        self._values = {field: array("d", bytes(8 * size)) for field in HISTORY_FIELDS}
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, snapshot, timestamp=None):
+        """Record the HISTORY_FIELDS of a snapshot."""
+        if timestamp is None:
+            timestamp = time.time()
+        if self._count:
+            # Keep the samples ordered when the clock steps back.
+            timestamp = max(timestamp, self._times[self._physical(self._count - 1)])
+
+        if self._count == self._size:
+            index = self._start
+            self._start = (self._start + 1) % self._size
+        else:
+            index = self._physical(self._count)
+            self._count += 1
+
+        self._times[index] = timestamp
+        for field, values in self._values.items():
+            values[index] = getattr(snapshot, field)
+
+        self._expire(timestamp - self._retention)
+
+    def resize(self, size, retention):
+        """Change the limits, keeping the newest samples that still fit."""
+        positions = range(max(0, self._count - size), self._count)
+        times = array("d", bytes(8 * size))
+        values = {field: array("d", bytes(8 * size)) for field in HISTORY_FIELDS}
+        for new, index in enumerate(map(self._physical, positions)):
+            times[new] = self._times[index]
+            for field, field_values in values.items():
+                field_values[new] = self._values[field][index]
+
+        self._size = size
+        self._retention = retention
+        self._times = times
+        self._values = values
+        self._start = 0
+        self._count = len(positions)
+        if self._count:
+            self._expire(times[self._count - 1] - retention)
+
+    def _physical(self, position):
+        return (self._start + position) % self._size
+
+    def _expire(self, limit):
+        while self._count and self._times[self._start] < limit:
+            self._start = (self._start + 1) % self._size
+            self._count -= 1
+
+    def _bisect(self, timestamp):
+        """Return the position of the first sample at or after timestamp."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._times[self._physical(middle)] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _positions(self, seconds, now):
+        if now is None:
+            now = time.time()
+        if seconds is None or seconds > self._retention:
+            seconds = self._retention
+        return range(self._bisect(now - seconds), self._count)
+
+    def get_window(self, field, seconds=None, now=None):
+        """Return the (timestamp, value) samples of the last seconds."""
+        values = self._values[field]
+        return [
+            (self._times[index], values[index])
+            for index in map(self._physical, self._positions(seconds, now))
+        ]
+
+    def get_aggregate(self, field, seconds=None, now=None):
+        """Aggregate the samples of the last seconds, None without samples."""
+        positions = self._positions(seconds, now)
+        if not positions:
+            return None
+
+        values = self._values[field]
+        first = self._physical(positions[0])
+        last = self._physical(positions[-1])
+        minimum = maximum = values[first]
+        total = 0.0
+        for index in map(self._physical, positions):
+            value = values[index]
+            total += value
+            if value < minimum:
+                minimum = value
+            elif value > maximum:
+                maximum = value
+
+        return HistoryAggregate(
+            count=len(positions),
+            first=values[first],
+            last=values[last],
+            minimum=minimum,
+            maximum=maximum,
+            mean=total / len(positions),
+            duration=self._times[last] - self._times[first],
+        )
+
+    def as_dict(self):
+        aggregates = {}
+        for field in HISTORY_FIELDS:
+            aggregate = self.get_aggregate(field)
+            aggregates[field] = aggregate._asdict() if aggregate else None
+
+        return {
+            "size": self._size,
+            "retention": self._retention,
+            "samples": self._count,
+            "aggregates": aggregates,
+        }
@@ -0,0 +1,151 @@
+"""Request timing and error counters of a Rika Firenet account."""
+
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+ENDPOINT_LOGIN = "login"
+ENDPOINT_SUMMARY = "summary"
+ENDPOINT_STATUS = "status"
+ENDPOINT_CONTROLS = "controls"
+ENDPOINTS = (ENDPOINT_LOGIN, ENDPOINT_SUMMARY, ENDPOINT_STATUS, ENDPOINT_CONTROLS)
+
+
+class LatencyHistogram:
+    """Cumulative latency distribution over fixed buckets."""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def record(self, seconds):
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def get_mean(self):
+        return self.total / self.count if self.count else None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.get_mean(),
+            "max": self.max,
+            "last": self.last,
+            "buckets": {
+                f"le_{bound}": count
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            },
+        }
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        # Time spent waiting for the request budget before sending
+        self.queue_wait = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+        self.errors = {}
+        self.last_error = None
+
+    def record(self, seconds, error=None):
+        self.latency.record(seconds)
+        if error is None:
+            self.successes += 1
+            return
+
+        self.failures += 1
+        self.errors[error] = self.errors.get(error, 0) + 1
+        self.last_error = error
+
+    def as_dict(self):
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "errors": dict(self.errors),
+            "last_error": self.last_error,
+            "latency": self.latency.as_dict(),
+            "queue_wait": self.queue_wait.as_dict(),
+        }
+
+
+class RikaFirenetMetrics:
+    """Counters of the requests, confirmations and refresh cycles."""
+
+    def __init__(self):
+        self.endpoints = {endpoint: EndpointMetrics() for endpoint in ENDPOINTS}
+        self.session_retries = 0
+        self.confirmations = {}
+        self.confirmation_polls = 0
+        self.confirmation_latency = LatencyHistogram()
+        self.cycles = EndpointMetrics()
+        self.unchanged_payloads = 0
+        self.skipped_notifications = 0
+        self.skipped_polls = 0
+
+    @contextmanager
+    def measure(self, endpoint):
+        """Time one request to an endpoint, an exception counts as failure."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as exception:
+            self.endpoints[endpoint].record(
+                time.monotonic() - start, type(exception).__name__
+            )
+            raise
+        self.endpoints[endpoint].record(time.monotonic() - start)
+
+    def record_queue_wait(self, endpoint, seconds):
+        self.endpoints[endpoint].queue_wait.record(seconds)
+
+    def record_session_retry(self):
+        self.session_retries += 1
+
+    def record_confirmation(self, result, seconds, polls):
+        """Count how a control write ended and the polls it took."""
+        self.confirmations[result] = self.confirmations.get(result, 0) + 1
+        self.confirmation_polls += polls
+        self.confirmation_latency.record(seconds)
+
+    def record_cycle(self, seconds, error=None):
+        self.cycles.record(seconds, error)
+
+    def record_unchanged_payload(self):
+        self.unchanged_payloads += 1
+
+    def record_skipped_notification(self):
+        self.skipped_notifications += 1
+
+    def record_skipped_poll(self):
+        self.skipped_polls += 1
+
+    def get_failures(self):
+        return sum(metrics.failures for metrics in self.endpoints.values())
+
+    def as_dict(self):
+        return {
+            "endpoints": {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in self.endpoints.items()
+            },
+            "session_retries": self.session_retries,
+            "confirmations": dict(self.confirmations),
+            "confirmation_polls": self.confirmation_polls,
+            "confirmation_latency": self.confirmation_latency.as_dict(),
+            "cycles": self.cycles.as_dict(),
+            "unchanged_payloads": self.unchanged_payloads,
+            "skipped_notifications": self.skipped_notifications,
+            "skipped_polls": self.skipped_polls,
+        }
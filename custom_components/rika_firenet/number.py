@@ -1,24 +1,120 @@
 import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, UnitOfMass
+from homeassistant.core import callback
 from .entity import RikaFirenetEntity
-from homeassistant.components.number import NumberEntity
+from homeassistant.components.number import NumberEntity, NumberEntityDescription
 
 from .const import DOMAIN
+from .core import FIELD_HOPPER_FILL
 from .core import RikaFirenetCoordinator
 from .core import RikaFirenetStove
 from .exceptions import RikaValidationError
 
 _LOGGER = logging.getLogger(__name__)
 
-DEVICE_NUMBERS = [
-    "room power request",
-    "heating power",
-    "convection fan1 level",
-    "convection fan1 area",
-    "convection fan2 level",
-    "convection fan2 area",
-]
+
+@dataclass(frozen=True, kw_only=True)
+class RikaFirenetNumberEntityDescription(NumberEntityDescription):
+    value_fn: Callable[[RikaFirenetStove], int]
+    set_fn: Callable[[RikaFirenetStove, int], Awaitable[None]]
+    fields: frozenset[str]
+    # Key of the stove control the number writes, None if it isn't one
+    control: str | None = None
+    # Field of the control in the rika_firenet.set_controls service
+    service_field: str | None = None
+
+
+DEVICE_NUMBERS = (
+    RikaFirenetNumberEntityDescription(
+        key="room power request",
+        icon="mdi:speedometer",
+        native_min_value=1,
+        native_max_value=4,
+        native_step=1,
+        value_fn=lambda stove: stove.get_room_power_request(),
+        set_fn=lambda stove, value: stove.async_set_room_power_request(value),
+        fields=frozenset({"room_power_request"}),
+        control="RoomPowerRequest",
+        service_field="room_power_request",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="heating power",
+        icon="mdi:speedometer",
+        native_min_value=0,
+        native_max_value=100,
+        native_step=10,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda stove: stove.get_heating_power(),
+        set_fn=lambda stove, value: stove.async_set_heating_power(value),
+        fields=frozenset({"heating_power"}),
+        control="heatingPower",
+        service_field="heating_power",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="convection fan1 level",
+        icon="mdi:speedometer",
+        native_min_value=0,
+        native_max_value=5,
+        native_step=1,
+        value_fn=lambda stove: stove.get_convection_fan1_level(),
+        set_fn=lambda stove, value: stove.async_set_convection_fan1_level(value),
+        fields=frozenset({"convection_fan1_level"}),
+        control="convectionFan1Level",
+        service_field="convection_fan1_level",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="convection fan1 area",
+        icon="mdi:speedometer",
+        native_min_value=-30,
+        native_max_value=30,
+        native_step=1,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda stove: stove.get_convection_fan1_area(),
+        set_fn=lambda stove, value: stove.async_set_convection_fan1_area(value),
+        fields=frozenset({"convection_fan1_area"}),
+        control="convectionFan1Area",
+        service_field="convection_fan1_area",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="convection fan2 level",
+        icon="mdi:speedometer",
+        native_min_value=0,
+        native_max_value=5,
+        native_step=1,
+        value_fn=lambda stove: stove.get_convection_fan2_level(),
+        set_fn=lambda stove, value: stove.async_set_convection_fan2_level(value),
+        fields=frozenset({"convection_fan2_level"}),
+        control="convectionFan2Level",
+        service_field="convection_fan2_level",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="convection fan2 area",
+        icon="mdi:speedometer",
+        native_min_value=-30,
+        native_max_value=30,
+        native_step=1,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda stove: stove.get_convection_fan2_area(),
+        set_fn=lambda stove, value: stove.async_set_convection_fan2_area(value),
+        fields=frozenset({"convection_fan2_area"}),
+        control="convectionFan2Area",
+        service_field="convection_fan2_area",
+    ),
+    RikaFirenetNumberEntityDescription(
+        key="hopper fill",
+        icon="mdi:storage-tank",
+        native_min_value=0,
+        native_max_value=200,
+        native_step=1,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda stove: stove.get_hopper_fill(),
+        set_fn=lambda stove, value: stove.async_set_hopper_fill(value),
+        fields=frozenset({FIELD_HOPPER_FILL}),
+    ),
+)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -31,132 +127,64 @@ async def async_setup_entry(hass, entry, async_add_entities):
     for stove in coordinator.get_stoves():
         stove_entities.extend(
             [
-                RikaFirenetStoveNumber(entry, stove, coordinator, number)
-                for number in DEVICE_NUMBERS
+                RikaFirenetStoveNumber(entry, stove, coordinator, description)
+                for description in DEVICE_NUMBERS
             ]
         )
 
     if stove_entities:
-        async_add_entities(stove_entities, True)
+        async_add_entities(stove_entities)
+
+    @callback
+    def async_add_stove(stove):
+        async_add_entities(
+            [
+                RikaFirenetStoveNumber(entry, stove, coordinator, description)
+                for description in DEVICE_NUMBERS
+            ]
+        )
+
+    entry.async_on_unload(coordinator.async_add_stove_listener(async_add_stove))
 
 
 class RikaFirenetStoveNumber(RikaFirenetEntity, NumberEntity):
+    entity_description: RikaFirenetNumberEntityDescription
+
     def __init__(
         self,
         config_entry,
         stove: RikaFirenetStove,
         coordinator: RikaFirenetCoordinator,
-        number,
+        description: RikaFirenetNumberEntityDescription,
     ):
-        super().__init__(config_entry, stove, coordinator, number)
-
-        self._number = number
-
-    @property
-    def native_min_value(self) -> float:
-        if self._number == "room power request":
-            return 1
-        elif self._number == "convection fan1 level":
-            return 0
-        elif self._number == "convection fan1 area":
-            return -30
-        elif self._number == "convection fan2 level":
-            return 0
-        elif self._number == "convection fan2 area":
-            return -30
-
-        return 0
+        super().__init__(config_entry, stove, coordinator, description.key)
 
-    @property
-    def native_max_value(self) -> float:
-        if self._number == "room power request":
-            return 4
-        elif self._number == "convection fan1 level":
-            return 5
-        elif self._number == "convection fan1 area":
-            return 30
-        elif self._number == "convection fan2 level":
-            return 5
-        elif self._number == "convection fan2 area":
-            return 30
-
-        return 100
-
-    @property
-    def native_step(self) -> float:
-        if self._number == "room power request":
-            return 1
-        elif self._number == "convection fan1 level":
-            return 1
-        elif self._number == "convection fan1 area":
-            return 1
-        elif self._number == "convection fan2 level":
-            return 1
-        elif self._number == "convection fan2 area":
-            return 1
-
-        return 10
+        self.entity_description = description
+        self._fields = description.fields
 
     @property
     def native_value(self):
-        if self._number == "room power request":
-            return self._stove.get_room_power_request()
-        elif self._number == "heating power":
-            return self._stove.get_heating_power()
-        elif self._number == "convection fan1 level":
-            return self._stove.get_convection_fan1_level()
-        elif self._number == "convection fan1 area":
-            return self._stove.get_convection_fan1_area()
-        elif self._number == "convection fan2 level":
-            return self._stove.get_convection_fan2_level()
-        elif self._number == "convection fan2 area":
-            return self._stove.get_convection_fan2_area()
+        return self.entity_description.value_fn(self._stove)
 
-    @property
-    def native_unit_of_measurement(self):
-        if self._number == "heating power":
-            return PERCENTAGE
-        elif self._number == "convection fan1 area":
-            return PERCENTAGE
-        elif self._number == "convection fan2 area":
-            return PERCENTAGE
+    async def async_set_native_value(self, value: float) -> None:
+        description = self.entity_description
 
-    @property
-    def icon(self):
-        return "mdi:speedometer"
-
-    def set_native_value(self, value: float) -> None:
         # Validate value is within bounds
-        min_value = self.native_min_value
-        max_value = self.native_max_value
-
-        if value < min_value or value > max_value:
+        if value < description.native_min_value or value > description.native_max_value:
             _LOGGER.error(
                 "Value %s for %s out of range [%s, %s]",
                 value,
-                self._number,
-                min_value,
-                max_value,
+                description.key,
+                description.native_min_value,
+                description.native_max_value,
             )
             raise RikaValidationError(
-                f"Value {value} for {self._number} out of valid range [{min_value}, {max_value}]"
+                f"Value {value} for {description.key} out of valid range "
+                f"[{description.native_min_value}, {description.native_max_value}]"
             )
 
-        _LOGGER.debug("set_value %s = %s", self._number, value)
-
-        int_value = int(value)
+        _LOGGER.debug("set_value %s = %s", description.key, value)
 
-        if self._number == "room power request":
-            self._stove.set_room_power_request(int_value)
-        elif self._number == "heating power":
-            self._stove.set_heating_power(int_value)
-        elif self._number == "convection fan1 level":
-            self._stove.set_convection_fan1_level(int_value)
-        elif self._number == "convection fan1 area":
-            self._stove.set_convection_fan1_area(int_value)
-        elif self._number == "convection fan2 level":
-            self._stove.set_convection_fan2_level(int_value)
-        elif self._number == "convection fan2 area":
-            self._stove.set_convection_fan2_area(int_value)
+        await description.set_fn(self._stove, int(value))
 
-        self.schedule_update_ha_state()
+        self.async_write_ha_state()
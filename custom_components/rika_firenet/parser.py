@@ -0,0 +1,69 @@
+"""Streaming extractor for the stove list of the Rika Firenet summary page."""
+
+from html.parser import HTMLParser
+
+STOVE_LIST_ID = "stoveList"
+
+
+class StoveListParser(HTMLParser):
+    """Collect the (id, name) pairs of the links in ul#stoveList.
+
+    Feed the page in chunks and stop as soon as ``done`` is set, the rest of
+    the page is never looked at. ``stoves`` stays None when no stove list
+    was found.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stoves = None
+        self.done = False
+        self._depth = 0
+        self._item_linked = False
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+
+        if self._depth == 0:
+            if tag == "ul" and dict(attrs).get("id") == STOVE_LIST_ID:
+                self.stoves = []
+                self._depth = 1
+            return
+
+        if tag == "ul":
+            self._depth += 1
+        elif tag == "li":
+            self._item_linked = False
+        elif tag == "a" and self._href is None and not self._item_linked:
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._href = href
+                self._text = []
+
+    def handle_endtag(self, tag):
+        if self.done or self._depth == 0:
+            return
+
+        if tag == "a" and self._href is not None:
+            stove_id = self._href.rsplit("/", 1)[-1]
+            self.stoves.append((stove_id, "".join(self._text)))
+            self._href = None
+            self._item_linked = True
+        elif tag == "ul":
+            self._depth -= 1
+            if self._depth == 0:
+                self.done = True
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+
+def parse_stove_list(content):
+    """Parse a complete summary page, see StoveListParser."""
+    parser = StoveListParser()
+    parser.feed(content)
+    parser.close()
+    return parser.stoves
@@ -1,30 +1,213 @@
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.const import UnitOfMass
 from homeassistant.const import UnitOfTemperature
 from homeassistant.const import PERCENTAGE
 from homeassistant.const import UnitOfTime
+from homeassistant.const import EntityCategory
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .entity import RikaFirenetEntity
 
-from .const import DOMAIN
+from .const import (
+    ATTR_COALESCED_WRITES,
+    ATTR_CONTROL_CONFIRMATION,
+    CONF_DIAGNOSTIC_SENSORS,
+    DOMAIN,
+    NAME,
+    VERSION,
+)
+from .core import FIELD_CONSUMPTION
 from .core import RikaFirenetCoordinator
 from .core import RikaFirenetStove
+from .metrics import (
+    ENDPOINT_CONTROLS,
+    ENDPOINT_LOGIN,
+    ENDPOINT_STATUS,
+    RikaFirenetMetrics,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-DEVICE_SENSORS = [
-    "stove consumption",
-    "stove runtime",
-    "stove temperature",
-    "stove thermostat",
-    "stove burning",
-    "stove status",
-    "room temperature",
-    "room thermostat",
-    "room power request",
-    "heating power",
-]
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+@dataclass(frozen=True, kw_only=True)
+class RikaFirenetSensorEntityDescription(EntityDescription):
+    value_fn: Callable[[RikaFirenetStove], Any]
+    attributes_fn: Callable[[RikaFirenetStove], dict] | None = None
+    fields: frozenset[str]
+
+
+DEVICE_SENSORS = (
+    RikaFirenetSensorEntityDescription(
+        key="stove consumption",
+        icon="mdi:weight-kilogram",
+        unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda stove: stove.get_stove_consumption(),
+        fields=frozenset({"stove_consumption"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="stove runtime",
+        icon="mdi:timelapse",
+        unit_of_measurement=UnitOfTime.HOURS,
+        value_fn=lambda stove: stove.get_stove_runtime(),
+        fields=frozenset({"stove_runtime"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="stove temperature",
+        icon="mdi:thermometer",
+        unit_of_measurement=UnitOfTemperature.CELSIUS,
+        value_fn=lambda stove: stove.get_stove_temperature(),
+        fields=frozenset({"stove_temperature"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="stove thermostat",
+        icon="mdi:thermometer",
+        unit_of_measurement=UnitOfTemperature.CELSIUS,
+        value_fn=lambda stove: stove.get_stove_thermostat(),
+        fields=frozenset({"room_thermostat"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="stove burning",
+        icon="mdi:fire",
+        value_fn=lambda stove: stove.is_stove_burning(),
+        fields=frozenset({"main_state"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="stove status",
+        icon="mdi:information-outline",
+        value_fn=lambda stove: stove.get_status_text(),
+        attributes_fn=lambda stove: {
+            ATTR_CONTROL_CONFIRMATION: stove.get_control_confirmation(),
+            ATTR_COALESCED_WRITES: stove.get_coalesced_writes(),
+        },
+        fields=frozenset({"status", ATTR_CONTROL_CONFIRMATION}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="room temperature",
+        icon="mdi:thermometer",
+        unit_of_measurement=UnitOfTemperature.CELSIUS,
+        value_fn=lambda stove: stove.get_room_temperature(),
+        fields=frozenset({"room_temperature"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="room thermostat",
+        icon="mdi:thermometer",
+        unit_of_measurement=UnitOfTemperature.CELSIUS,
+        value_fn=lambda stove: stove.get_room_thermostat(),
+        fields=frozenset({"room_thermostat"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="room power request",
+        value_fn=lambda stove: stove.get_room_power_request(),
+        fields=frozenset({"room_power_request"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="heating power",
+        icon="mdi:speedometer",
+        unit_of_measurement=PERCENTAGE,
+        value_fn=lambda stove: stove.get_heating_power(),
+        fields=frozenset({"heating_power"}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="pellet consumption rate",
+        icon="mdi:speedometer",
+        unit_of_measurement=f"{UnitOfMass.KILOGRAMS}/{UnitOfTime.HOURS}",
+        value_fn=lambda stove: _round(stove.get_consumption_rate(), 2),
+        fields=frozenset({FIELD_CONSUMPTION}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="daily pellet consumption",
+        icon="mdi:weight-kilogram",
+        unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda stove: _round(stove.get_daily_consumption(), 1),
+        fields=frozenset({FIELD_CONSUMPTION}),
+    ),
+    RikaFirenetSensorEntityDescription(
+        key="hopper empty",
+        icon="mdi:storage-tank-outline",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda stove: _isoformat(stove.get_hopper_empty()),
+        attributes_fn=lambda stove: {
+            "remaining": _round(stove.get_hopper_remaining(), 1),
+        },
+        fields=frozenset({FIELD_CONSUMPTION}),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class RikaFirenetDiagnosticSensorEntityDescription(EntityDescription):
+    value_fn: Callable[[RikaFirenetMetrics], Any]
+
+
+def _milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000)
+
+
+DIAGNOSTIC_SENSORS = (
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="login latency",
+        icon="mdi:timer-outline",
+        unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: _milliseconds(
+            metrics.endpoints[ENDPOINT_LOGIN].latency.last
+        ),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="status latency",
+        icon="mdi:timer-outline",
+        unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: _milliseconds(
+            metrics.endpoints[ENDPOINT_STATUS].latency.last
+        ),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="controls latency",
+        icon="mdi:timer-outline",
+        unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: _milliseconds(
+            metrics.endpoints[ENDPOINT_CONTROLS].latency.last
+        ),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="controls queue wait",
+        icon="mdi:timer-sand",
+        unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: _milliseconds(
+            metrics.endpoints[ENDPOINT_CONTROLS].queue_wait.last
+        ),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="refresh duration",
+        icon="mdi:timer-outline",
+        unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: _milliseconds(metrics.cycles.latency.last),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="request failures",
+        icon="mdi:alert-circle-outline",
+        value_fn=lambda metrics: metrics.get_failures(),
+    ),
+    RikaFirenetDiagnosticSensorEntityDescription(
+        key="confirmation polls",
+        icon="mdi:counter",
+        value_fn=lambda metrics: metrics.confirmation_polls,
+    ),
+)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -37,72 +220,100 @@ async def async_setup_entry(hass, entry, async_add_entities):
     for stove in coordinator.get_stoves():
         stove_entities.extend(
             [
-                RikaFirenetStoveSensor(entry, stove, coordinator, sensor)
-                for sensor in DEVICE_SENSORS
+                RikaFirenetStoveSensor(entry, stove, coordinator, description)
+                for description in DEVICE_SENSORS
             ]
         )
 
+    if entry.options.get(CONF_DIAGNOSTIC_SENSORS, False):
+        stove_entities.extend(
+            RikaFirenetDiagnosticSensor(entry, coordinator, description)
+            for description in DIAGNOSTIC_SENSORS
+        )
+
     if stove_entities:
-        async_add_entities(stove_entities, True)
+        async_add_entities(stove_entities)
+
+    @callback
+    def async_add_stove(stove):
+        async_add_entities(
+            [
+                RikaFirenetStoveSensor(entry, stove, coordinator, description)
+                for description in DEVICE_SENSORS
+            ]
+        )
+
+    entry.async_on_unload(coordinator.async_add_stove_listener(async_add_stove))
 
 
 class RikaFirenetStoveSensor(RikaFirenetEntity):
+    entity_description: RikaFirenetSensorEntityDescription
+
     def __init__(
         self,
         config_entry,
         stove: RikaFirenetStove,
         coordinator: RikaFirenetCoordinator,
-        sensor,
+        description: RikaFirenetSensorEntityDescription,
     ):
-        super().__init__(config_entry, stove, coordinator, sensor)
+        super().__init__(config_entry, stove, coordinator, description.key)
 
-        self._sensor = sensor
+        self.entity_description = description
+        self._fields = description.fields
 
     @property
     def state(self):
-        if self._sensor == "stove consumption":
-            return self._stove.get_stove_consumption()
-        elif self._sensor == "stove runtime":
-            return self._stove.get_stove_runtime()
-        elif self._sensor == "stove temperature":
-            return self._stove.get_stove_temperature()
-        elif self._sensor == "stove thermostat":
-            return self._stove.get_stove_thermostat()
-        elif self._sensor == "stove burning":
-            return self._stove.is_stove_burning()
-        elif self._sensor == "stove status":
-            return self._stove.get_status_text()
-        elif self._sensor == "room temperature":
-            return self._stove.get_room_temperature()
-        elif self._sensor == "room thermostat":
-            return self._stove.get_room_thermostat()
-        elif self._sensor == "room power request":
-            return self._stove.get_room_power_request()
-        elif self._sensor == "heating power":
-            return self._stove.get_heating_power()
+        return self.entity_description.value_fn(self._stove)
+
+    @property
+    def extra_state_attributes(self):
+        attributes = super().extra_state_attributes
+        if self.entity_description.attributes_fn is not None:
+            attributes = {
+                **self.entity_description.attributes_fn(self._stove),
+                **(attributes or {}),
+            }
+        return attributes
+
+
+class RikaFirenetDiagnosticSensor(CoordinatorEntity):
+    """Request metrics of the account of a config entry."""
+
+    entity_description: RikaFirenetDiagnosticSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        config_entry,
+        coordinator: RikaFirenetCoordinator,
+        description: RikaFirenetDiagnosticSensorEntityDescription,
+    ):
+        super().__init__(coordinator)
+
+        self.entity_description = description
+        self._config_entry = config_entry
+        self._attr_name = f"{config_entry.title} {description.key}"
+        self._attr_unique_id = f"{config_entry.entry_id} {description.key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": f"{NAME} {config_entry.title}",
+            "model": VERSION,
+            "manufacturer": NAME,
+        }
+
+    async def async_added_to_hass(self):
+        # Skip CoordinatorEntity, the metrics change with every refresh even
+        # when the stoves and so the coordinator listeners don't.
+        await super(CoordinatorEntity, self).async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_metrics_listener(self._handle_coordinator_update)
+        )
 
     @property
-    def unit_of_measurement(self):
-        if "temperature" in self._sensor or "thermostat" in self._sensor:
-            return UnitOfTemperature.CELSIUS
-        elif self._sensor == "stove consumption":
-            return UnitOfMass.KILOGRAMS
-        elif self._sensor == "stove runtime":
-            return UnitOfTime.HOURS
-        elif self._sensor == "heating power":
-            return PERCENTAGE
+    def available(self):
+        # Most interesting exactly when the cloud fails.
+        return True
 
     @property
-    def icon(self):
-        if "temperature" in self._sensor or "thermostat" in self._sensor:
-            return "mdi:thermometer"
-        elif self._sensor == "stove consumption":
-            return "mdi:weight-kilogram"
-        elif self._sensor == "stove runtime":
-            return "mdi:timelapse"
-        elif self._sensor == "stove burning":
-            return "mdi:fire"
-        elif self._sensor == "stove status":
-            return "mdi:information-outline"
-        elif self._sensor == "heating power":
-            return "mdi:speedometer"
+    def state(self):
+        return self.entity_description.value_fn(self.coordinator.get_metrics())
@@ -0,0 +1,108 @@
+"""Services of the Rika Firenet integration."""
+
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from .climate import MAX_TEMP, MIN_TEMP
+from .const import ATTR_TARGET_TEMPERATURE, DOMAIN, SERVICE_SET_CONTROLS
+from .exceptions import RikaValidationError
+from .number import DEVICE_NUMBERS
+from .switch import DEVICE_SWITCH
+
+_LOGGER = logging.getLogger(__name__)
+
+# Values of the operatingMode control
+OPERATING_MODES = (0, 1, 2)  # manual, automatic, comfort
+
+# Service field -> (stove control, validator), ranges shared with the entities
+SET_CONTROLS_FIELDS = {
+    ATTR_TARGET_TEMPERATURE: (
+        "targetTemperature",
+        vol.All(
+            vol.Coerce(int), vol.Range(min=MIN_TEMP, max=MAX_TEMP), vol.Coerce(str)
+        ),
+    ),
+    "operating_mode": (
+        "operatingMode",
+        vol.All(vol.Coerce(int), vol.In(OPERATING_MODES)),
+    ),
+    "heating_times_active_for_comfort": ("heatingTimesActiveForComfort", cv.boolean),
+    **{
+        description.service_field: (
+            description.control,
+            vol.All(
+                vol.Coerce(int),
+                vol.Range(
+                    min=description.native_min_value,
+                    max=description.native_max_value,
+                ),
+            ),
+        )
+        for description in DEVICE_NUMBERS
+        if description.service_field is not None
+    },
+    **{
+        description.service_field: (description.control, cv.boolean)
+        for description in DEVICE_SWITCH
+    },
+}
+
+SET_CONTROLS_SCHEMA = vol.All(
+    cv.make_entity_service_schema(
+        {
+            vol.Optional(field): validator
+            for field, (_, validator) in SET_CONTROLS_FIELDS.items()
+        }
+    ),
+    cv.has_at_least_one_key(*SET_CONTROLS_FIELDS),
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Register the services, whichever platforms the entries enable."""
+
+    async def async_set_controls(call: ServiceCall):
+        """Apply any subset of the stove controls in a single write."""
+        controls = {
+            SET_CONTROLS_FIELDS[field][0]: value
+            for field, value in call.data.items()
+            if field in SET_CONTROLS_FIELDS
+        }
+        stoves = await _async_get_target_stoves(hass, call)
+        if not stoves:
+            raise RikaValidationError("No Rika Firenet stove targeted")
+
+        _LOGGER.debug("set_controls(): %s to %s", controls, stoves)
+        await asyncio.gather(*(stove.async_set_controls(controls) for stove in stoves))
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_CONTROLS, async_set_controls, schema=SET_CONTROLS_SCHEMA
+    )
+
+
+async def _async_get_target_stoves(hass: HomeAssistant, call: ServiceCall):
+    """Return the stoves of the targeted entities, each stove once."""
+    registry = er.async_get(hass)
+    stoves = {}
+
+    for entity_id in await async_extract_entity_ids(hass, call):
+        entry = registry.async_get(entity_id)
+        if entry is None or entry.platform != DOMAIN:
+            continue
+        coordinator = hass.data.get(DOMAIN, {}).get(entry.config_entry_id)
+        if coordinator is None:
+            continue
+        # Unique ids of stove entities start with the stove id.
+        stove_id = entry.unique_id.partition(" ")[0]
+        for stove in coordinator.get_stoves():
+            if stove.get_id() == stove_id:
+                stoves[stove_id] = stove
+
+    return list(stoves.values())
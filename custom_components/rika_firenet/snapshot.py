@@ -0,0 +1,183 @@
+"""Decoded stove state of a Rika Firenet /status payload."""
+
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import NamedTuple
+
+from .exceptions import RikaValidationError
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return value
+    return float(value)
+
+
+# (attribute, payload key, converter) of the decoded fields
+SENSOR_FIELDS = (
+    ("stove_consumption", "parameterFeedRateTotal", _number),
+    ("stove_runtime", "parameterRuntimePellets", _number),
+    ("stove_temperature", "inputFlameTemperature", float),
+    ("room_temperature", "inputRoomTemperature", float),
+    ("main_state", "statusMainState", int),
+    ("sub_state", "statusSubState", int),
+    ("frost_started", "statusFrostStarted", bool),
+)
+CONTROL_FIELDS = (
+    ("room_thermostat", "targetTemperature", float),
+    ("operation_mode", "operatingMode", float),
+    ("set_back_temperature", "setBackTemperature", float),
+    ("heating_times_active_for_comfort", "heatingTimesActiveForComfort", bool),
+    ("on_off", "onOff", bool),
+    ("convection_fan1_active", "convectionFan1Active", bool),
+    ("convection_fan2_active", "convectionFan2Active", bool),
+    ("room_power_request", "RoomPowerRequest", int),
+    ("convection_fan1_level", "convectionFan1Level", int),
+    ("convection_fan1_area", "convectionFan1Area", int),
+    ("convection_fan2_level", "convectionFan2Level", int),
+    ("convection_fan2_area", "convectionFan2Area", int),
+    ("heating_power", "heatingPower", int),
+)
+_CONTROL_FIELDS_BY_KEY = {key: (attr, convert) for attr, key, convert in CONTROL_FIELDS}
+
+
+class StoveStatus(NamedTuple):
+    picture: str
+    text: str
+
+
+STATUS_FROST_PROTECTION = StoveStatus(
+    "/images/status/Visu_Freeze.svg", "frost_protection"
+)
+STATUS_UNKNOWN = StoveStatus("/images/status/Visu_Off.svg", "unknown")
+
+_STATUS_STANDBY = StoveStatus("/images/status/Visu_Standby.svg", "standby")
+_STATUS_BIG_CLEAN = StoveStatus("/images/status/Visu_Clean.svg", "big_clean")
+_STATUS_SPLIT_LOG_CHECK = StoveStatus(
+    "/images/status/Visu_SpliLog.svg", "split_log_check"
+)
+_STATUS_SPLIT_LOG_MODE = StoveStatus(
+    "/images/status/Visu_SpliLog.svg", "split_log_mode"
+)
+
+# Statuses of a (main state, sub state) pair
+_SUB_STATUSES = {
+    (1, 0): StoveStatus("/images/status/Visu_Off.svg", "stove_off"),
+    (1, 1): _STATUS_STANDBY,
+    (1, 2): StoveStatus("/images/status/Visu_Standby.svg", "external_request"),
+    (1, 3): _STATUS_STANDBY,
+    (5, 3): _STATUS_BIG_CLEAN,
+    (5, 4): _STATUS_BIG_CLEAN,
+}
+# Statuses of a main state whatever its sub state
+_MAIN_STATUSES = {
+    1: StoveStatus("/images/status/Visu_Off.svg", "sub_state_unknown"),
+    2: StoveStatus("/images/status/Visu_Ignition.svg", "ignition_on"),
+    3: StoveStatus("/images/status/Visu_Ignition.svg", "starting_up"),
+    4: StoveStatus("/images/status/Visu_Control.svg", "running"),
+    5: StoveStatus("/images/status/Visu_Clean.svg", "clean"),
+    6: StoveStatus("/images/status/Visu_BurnOff.svg", "burn_off"),
+    11: _STATUS_SPLIT_LOG_CHECK,
+    13: _STATUS_SPLIT_LOG_CHECK,
+    14: _STATUS_SPLIT_LOG_CHECK,
+    16: _STATUS_SPLIT_LOG_CHECK,
+    17: _STATUS_SPLIT_LOG_CHECK,
+    50: _STATUS_SPLIT_LOG_CHECK,
+    20: _STATUS_SPLIT_LOG_MODE,
+    21: _STATUS_SPLIT_LOG_MODE,
+}
+
+
+def decode_status(main_state, sub_state, frost_started):
+    """Return the shared StoveStatus of the status fields of a payload."""
+    if frost_started:
+        return STATUS_FROST_PROTECTION
+
+    status = _SUB_STATUSES.get((main_state, sub_state))
+    if status is None:
+        status = _MAIN_STATUSES.get(main_state, STATUS_UNKNOWN)
+    return status
+
+
+@dataclass(frozen=True, slots=True)
+class StoveSnapshot:
+    """Immutable, typed view of one /status payload.
+
+    ``controls`` keeps the raw controls, a /controls POST sends them all back.
+    ``status`` is decoded once from the main/sub/frost fields.
+    """
+
+    controls: MappingProxyType
+    status: StoveStatus
+    stove_consumption: float
+    stove_runtime: float
+    stove_temperature: float
+    room_temperature: float
+    main_state: int
+    sub_state: int
+    frost_started: bool
+    room_thermostat: float
+    operation_mode: float
+    set_back_temperature: float
+    heating_times_active_for_comfort: bool
+    on_off: bool
+    convection_fan1_active: bool
+    convection_fan2_active: bool
+    room_power_request: int
+    convection_fan1_level: int
+    convection_fan1_area: int
+    convection_fan2_level: int
+    convection_fan2_area: int
+    heating_power: int
+
+    @classmethod
+    def from_payload(cls, payload):
+        try:
+            sensors = payload["sensors"]
+            controls = payload["controls"]
+            values = {
+                attr: convert(sensors[key]) for attr, key, convert in SENSOR_FIELDS
+            }
+            values.update(
+                {attr: convert(controls[key]) for attr, key, convert in CONTROL_FIELDS}
+            )
+        except (KeyError, TypeError, ValueError) as exception:
+            raise RikaValidationError(
+                f"Invalid stove status, missing or malformed {exception}"
+            ) from exception
+
+        status = decode_status(
+            values["main_state"], values["sub_state"], values["frost_started"]
+        )
+        return cls(controls=MappingProxyType(dict(controls)), status=status, **values)
+
+    def as_payload(self):
+        """Return the part of the /status payload the snapshot decodes."""
+        return {
+            "sensors": {key: getattr(self, attr) for attr, key, _ in SENSOR_FIELDS},
+            "controls": dict(self.controls),
+        }
+
+    def with_controls(self, changes):
+        """Return a copy with raw control values, e.g. written ones, applied."""
+        values = {}
+        for key, value in changes.items():
+            if key in _CONTROL_FIELDS_BY_KEY:
+                attr, convert = _CONTROL_FIELDS_BY_KEY[key]
+                values[attr] = convert(value)
+        return replace(self, **values)
+
+    def diff(self, other):
+        """Return the names of the fields that differ from another snapshot."""
+        if other is None:
+            return SNAPSHOT_FIELDS
+        return frozenset(
+            name
+            for name in SNAPSHOT_FIELDS
+            if getattr(self, name) != getattr(other, name)
+        )
+
+
+SNAPSHOT_FIELDS = frozenset(
+    field.name for field in fields(StoveSnapshot) if field.name != "controls"
+)
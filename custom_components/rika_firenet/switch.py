@@ -1,6 +1,9 @@
 import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 
-from homeassistant.components.switch import SwitchEntity
+from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
+from homeassistant.core import callback
 
 from .entity import RikaFirenetEntity
 
@@ -10,7 +13,51 @@ from .core import RikaFirenetStove
 
 _LOGGER = logging.getLogger(__name__)
 
-DEVICE_SWITCH = ["on off", "convection fan1", "convection fan2"]
+
+@dataclass(frozen=True, kw_only=True)
+class RikaFirenetSwitchEntityDescription(SwitchEntityDescription):
+    is_on_fn: Callable[[RikaFirenetStove], bool]
+    turn_on_fn: Callable[[RikaFirenetStove], Awaitable[None]]
+    turn_off_fn: Callable[[RikaFirenetStove], Awaitable[None]]
+    fields: frozenset[str]
+    # Key of the stove control the switch writes
+    control: str
+    # Field of the control in the rika_firenet.set_controls service
+    service_field: str
+
+
+DEVICE_SWITCH = (
+    RikaFirenetSwitchEntityDescription(
+        key="on off",
+        icon="hass:power",
+        is_on_fn=lambda stove: stove.is_stove_on(),
+        turn_on_fn=lambda stove: stove.async_turn_on(),
+        turn_off_fn=lambda stove: stove.async_turn_off(),
+        fields=frozenset({"on_off"}),
+        control="onOff",
+        service_field="on_off",
+    ),
+    RikaFirenetSwitchEntityDescription(
+        key="convection fan1",
+        icon="hass:power",
+        is_on_fn=lambda stove: stove.is_stove_convection_fan1_on(),
+        turn_on_fn=lambda stove: stove.async_turn_convection_fan1_on(),
+        turn_off_fn=lambda stove: stove.async_turn_convection_fan1_off(),
+        fields=frozenset({"convection_fan1_active"}),
+        control="convectionFan1Active",
+        service_field="convection_fan1_active",
+    ),
+    RikaFirenetSwitchEntityDescription(
+        key="convection fan2",
+        icon="hass:power",
+        is_on_fn=lambda stove: stove.is_stove_convection_fan2_on(),
+        turn_on_fn=lambda stove: stove.async_turn_convection_fan2_on(),
+        turn_off_fn=lambda stove: stove.async_turn_convection_fan2_off(),
+        fields=frozenset({"convection_fan2_active"}),
+        control="convectionFan2Active",
+        service_field="convection_fan2_active",
+    ),
+)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -23,59 +70,54 @@ async def async_setup_entry(hass, entry, async_add_entities):
     for stove in coordinator.get_stoves():
         stove_entities.extend(
             [
-                RikaFirenetStoveBinarySwitch(entry, stove, coordinator, number)
-                for number in DEVICE_SWITCH
+                RikaFirenetStoveBinarySwitch(entry, stove, coordinator, description)
+                for description in DEVICE_SWITCH
             ]
         )
     if stove_entities:
-        async_add_entities(stove_entities, True)
+        async_add_entities(stove_entities)
+
+    @callback
+    def async_add_stove(stove):
+        async_add_entities(
+            [
+                RikaFirenetStoveBinarySwitch(entry, stove, coordinator, description)
+                for description in DEVICE_SWITCH
+            ]
+        )
+
+    entry.async_on_unload(coordinator.async_add_stove_listener(async_add_stove))
 
 
 class RikaFirenetStoveBinarySwitch(RikaFirenetEntity, SwitchEntity):
+    entity_description: RikaFirenetSwitchEntityDescription
+
     def __init__(
         self,
         config_entry,
         stove: RikaFirenetStove,
         coordinator: RikaFirenetCoordinator,
-        number,
+        description: RikaFirenetSwitchEntityDescription,
     ):
-        super().__init__(config_entry, stove, coordinator, number)
+        super().__init__(config_entry, stove, coordinator, description.key)
 
-        self._number = number
+        self.entity_description = description
+        self._fields = description.fields
 
-    def turn_on(self, **kwargs):  # pylint: disable=unused-argument
-        _LOGGER.info("turn_on " + self._number)
+    async def async_turn_on(self, **kwargs):  # pylint: disable=unused-argument
+        _LOGGER.info("turn_on " + self.entity_description.key)
 
-        if self._number == "on off":
-            self._stove.turn_on()
-        elif self._number == "convection fan1":
-            self._stove.turn_convection_fan1_on()
-        elif self._number == "convection fan2":
-            self._stove.turn_convection_fan2_on()
+        await self.entity_description.turn_on_fn(self._stove)
 
-        self.schedule_update_ha_state()
+        self.async_write_ha_state()
 
-    def turn_off(self, **kwargs):  # pylint: disable=unused-argument
-        _LOGGER.info("turn_off " + self._number)
+    async def async_turn_off(self, **kwargs):  # pylint: disable=unused-argument
+        _LOGGER.info("turn_off " + self.entity_description.key)
 
-        if self._number == "on off":
-            self._stove.turn_off()
-        elif self._number == "convection fan1":
-            self._stove.turn_convection_fan1_off()
-        elif self._number == "convection fan2":
-            self._stove.turn_convection_fan2_off()
+        await self.entity_description.turn_off_fn(self._stove)
 
-        self.schedule_update_ha_state()
-
-    @property
-    def icon(self):
-        return "hass:power"
+        self.async_write_ha_state()
 
     @property
     def is_on(self):
-        if self._number == "on off":
-            return self._stove.is_stove_on()
-        elif self._number == "convection fan1":
-            return self._stove.is_stove_convection_fan1_on()
-        elif self._number == "convection fan2":
-            return self._stove.is_stove_convection_fan2_on()
+        return self.entity_description.is_on_fn(self._stove)